@@ -1,33 +1,123 @@
 from __future__ import annotations
 
-import json
+import atexit
+import hashlib
+import hmac
 import os
 import time
 import traceback
-from typing import Any
-
-from flask import Flask, jsonify, request
-
-from laitest.ai import ai_runtime_status, generate_cases, professional_case_from_suggested
-from laitest.db import db_conn, json_loads, row_to_dict, utc_now_iso
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
+
+from flask import Flask, request, stream_with_context
+
+from laitest import _json
+from laitest.ai import (
+    GENERATE_BATCH_MAX_PROMPTS,
+    ai_runtime_status,
+    generate_cases,
+    generate_cases_batch,
+    professional_case_from_suggested,
+)
+from laitest.db import (
+    db_conn,
+    db_epoch,
+    fetch_cases_by_id,
+    iter_dicts,
+    json_loads,
+    row_to_dict,
+    table_version,
+    utc_now_iso,
+)
 from laitest.ids import new_id
-from laitest.runner import analyze_failures, run_case, summarize_run
+from laitest.runner import analyze_failures, run_cases, summarize_status_counts
 
 app = Flask(__name__)
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, "") or default))
+    except ValueError:
+        return default
+
+
+# Runs execute off the request thread; clients poll /api/run/<id> for the result.
+_RUN_EXECUTOR = ThreadPoolExecutor(max_workers=_env_int("LAITEST_RUN_WORKERS", 4), thread_name_prefix="laitest-run")
+atexit.register(_RUN_EXECUTOR.shutdown, wait=True)
+# Except on Vercel: the instance may be frozen as soon as the response is sent,
+# and a later poll can reach another instance with its own /tmp database, so a
+# background run could sit in "running" forever. Runs execute inline there.
+_RUN_INLINE = bool(os.environ.get("VERCEL", "").strip())
+
+
+def _json_response(payload: object, code: int = 200) -> Any:
+    return app.response_class(_json.dumps(payload), status=code, mimetype="application/json")
+
+
+# Resolved once per process; set LAITEST_TOKEN before the app is imported.
+_TOKEN = os.environ.get("LAITEST_TOKEN", "").strip()
+_EXPECTED_AUTH = f"Bearer {_TOKEN}".encode("utf-8") if _TOKEN else None
+
+
 def _require_token() -> tuple[bool, tuple[Any, int] | None]:
-    token = os.environ.get("LAITEST_TOKEN", "").strip()
-    if not token:
+    if _EXPECTED_AUTH is None:
         return True, None
-    auth = request.headers.get("Authorization", "")
-    if auth == f"Bearer {token}":
+    auth = request.headers.get("Authorization", "").encode("utf-8", "surrogateescape")
+    if hmac.compare_digest(auth, _EXPECTED_AUTH):
         return True, None
-    return False, (jsonify({"error": "unauthorized"}), 401)
+    return False, (_json_response({"error": "unauthorized"}), 401)
+
+
+def _list_etag(con: Any, table: str) -> str:
+    # Keyed on the database epoch, the table's write counter and the filters
+    # in the query string.
+    key = f"{db_epoch(con)}:{table}:{table_version(con, table)}:{request.query_string.decode('latin-1')}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _not_modified(etag: str) -> Any | None:
+    if not request.if_none_match.contains(etag):
+        return None
+    resp = app.response_class(status=304)
+    resp.set_etag(etag)
+    return resp
+
+
+def _stream_json_list(key: str, sql: str, args: tuple[Any, ...], decode: Callable[[dict[str, Any]], None]) -> Any:
+    """Stream `{"<key>": [...]}` row by row instead of building the whole list."""
+    # The version is read before the rows, so a concurrent write can only make
+    # the ETag stale (next request refetches), never newer than the body.
+    with db_conn() as con:
+        etag = _list_etag(con, key)
+    cached = _not_modified(etag)
+    if cached is not None:
+        return cached
+
+    def gen() -> Iterator[bytes]:
+        # The connection stays checked out until the generator is exhausted or closed.
+        with db_conn() as con:
+            yield b'{"' + key.encode("ascii") + b'":['
+            sep = b""
+            dumps = _json.dumps
+            for d in iter_dicts(con.execute(sql, args)):
+                decode(d)
+                yield sep + dumps(d)
+                sep = b","
+            yield b"]}"
+
+    resp = app.response_class(stream_with_context(gen()), mimetype="application/json")
+    resp.set_etag(etag)
+    return resp
 
 
 def _body() -> dict[str, Any]:
-    data = request.get_json(silent=True)
+    if not request.is_json:
+        return {}
+    try:
+        data = _json.loads(request.get_data(cache=False))
+    except ValueError:
+        return {}
     return data if isinstance(data, dict) else {}
 
 
@@ -45,32 +135,48 @@ def _execute_run(run_id: str) -> str:
             con.commit()
 
             items = con.execute("SELECT * FROM run_items WHERE run_id=?", (run_id,)).fetchall()
+            cases_by_id = fetch_cases_by_id(con, (it["case_id"] for it in items))
+
+            # Cases run concurrently in runner.run_cases; all writes stay on this
+            # thread's connection and land in one transaction at the end.
+            # Per-item loops: bind hot callables as locals.
+            updates = []
+            pending = []
+            add_update, add_pending = updates.append, pending.append
+            lookup, loads = cases_by_id.get, json_loads
             for it in items:
-                case = con.execute("SELECT * FROM cases WHERE id=?", (it["case_id"],)).fetchone()
+                case = lookup(it["case_id"])
                 if not case:
-                    con.execute(
-                        "UPDATE run_items SET status=?, log=? WHERE id=?",
-                        ("failed", "case not found", it["id"]),
-                    )
-                    con.commit()
+                    add_update(("failed", None, "case not found", None, it["id"]))
                     continue
-
-                kind = str(case["kind"])
-                spec = json_loads(str(case["spec_json"]), {})
-                ok, msg, data, dur_ms = run_case(kind=kind, spec=spec)
-                status = "passed" if ok else "failed"
+                add_pending((it, str(case["kind"]), loads(str(case["spec_json"]), {})))
+
+            results = run_cases([(kind, spec) for _, kind, spec in pending])
+            dumps_text = _json.dumps_text
+            for (it, _, _), (ok, msg, data, dur_ms) in zip(pending, results):
+                add_update(("passed" if ok else "failed", int(dur_ms), msg, dumps_text(data), it["id"]))
+
+            con.execute("BEGIN IMMEDIATE")
+            con.executemany(
+                "UPDATE run_items SET status=?, duration_ms=COALESCE(?, duration_ms), log=?, "
+                "data_json=COALESCE(?, data_json) WHERE id=?",
+                updates,
+            )
+            counts = dict(
                 con.execute(
-                    "UPDATE run_items SET status=?, duration_ms=?, log=?, data_json=? WHERE id=?",
-                    (status, int(dur_ms), msg, json.dumps(data, ensure_ascii=True), it["id"]),
-                )
-                con.commit()
-
-            items2 = [row_to_dict(r) for r in con.execute("SELECT * FROM run_items WHERE run_id=?", (run_id,))]
-            summary = summarize_run(items2)
-            analysis = analyze_failures(items2)
+                    "SELECT status, COUNT(*) FROM run_items WHERE run_id=? GROUP BY status",
+                    (run_id,),
+                ).fetchall()
+            )
+            summary = summarize_status_counts(counts)
+            failed = [
+                row_to_dict(r)
+                for r in con.execute("SELECT * FROM run_items WHERE run_id=? AND status='failed'", (run_id,))
+            ]
+            analysis = analyze_failures(failed)
             con.execute(
                 "UPDATE runs SET status=?, finished_at=?, summary_json=? WHERE id=?",
-                ("finished", utc_now_iso(), json.dumps({**summary, **analysis}, ensure_ascii=True), run_id),
+                ("finished", utc_now_iso(), _json.dumps_text({**summary, **analysis}), run_id),
             )
             con.commit()
             return "finished"
@@ -96,24 +202,30 @@ def _auth_guard() -> tuple[Any, int] | None:
 
 @app.get("/api/")
 def api_home() -> Any:
-    return jsonify({"ok": True, "name": "laitest api"})
+    return _json_response({"ok": True, "name": "laitest api"})
 
 
 @app.get("/api/health")
 def health() -> Any:
-    return jsonify({"ok": True, "ts": utc_now_iso()})
+    return _json_response({"ok": True, "ts": utc_now_iso()})
 
 
 @app.get("/api/ai/status")
 def ai_status() -> Any:
-    return jsonify({"ok": True, "runtime": ai_runtime_status()})
+    return _json_response({"ok": True, "runtime": ai_runtime_status()})
 
 
 @app.get("/api/projects")
 def get_projects() -> Any:
     with db_conn() as con:
-        rows = con.execute("SELECT * FROM projects ORDER BY created_at DESC").fetchall()
-        return jsonify({"projects": [row_to_dict(r) for r in rows]})
+        etag = _list_etag(con, "projects")
+        cached = _not_modified(etag)
+        if cached is not None:
+            return cached
+        rows = list(iter_dicts(con.execute("SELECT * FROM projects ORDER BY created_at DESC")))
+    resp = _json_response({"projects": rows})
+    resp.set_etag(etag)
+    return resp
 
 
 @app.post("/api/projects")
@@ -121,7 +233,7 @@ def post_projects() -> tuple[Any, int] | Any:
     body = _body()
     name = str(body.get("name") or "").strip()
     if not name:
-        return jsonify({"error": "missing name"}), 400
+        return _json_response({"error": "missing name"}, 400)
 
     pid = new_id("prj")
     with db_conn() as con:
@@ -130,7 +242,7 @@ def post_projects() -> tuple[Any, int] | Any:
             (pid, name, utc_now_iso()),
         )
         con.commit()
-    return jsonify({"project": {"id": pid, "name": name}}), 201
+    return _json_response({"project": {"id": pid, "name": name}}, 201)
 
 
 @app.delete("/api/project/<project_id>")
@@ -138,21 +250,28 @@ def del_project(project_id: str) -> Any:
     with db_conn() as con:
         con.execute("DELETE FROM projects WHERE id=?", (project_id,))
         con.commit()
-    return jsonify({"ok": True})
+    return _json_response({"ok": True})
 
 
 @app.get("/api/suites")
 def get_suites() -> Any:
     project_id = request.args.get("project_id", "").strip()
     with db_conn() as con:
+        etag = _list_etag(con, "suites")
+        cached = _not_modified(etag)
+        if cached is not None:
+            return cached
         if project_id:
-            rows = con.execute(
+            cur = con.execute(
                 "SELECT * FROM suites WHERE project_id=? ORDER BY created_at DESC",
                 (project_id,),
-            ).fetchall()
+            )
         else:
-            rows = con.execute("SELECT * FROM suites ORDER BY created_at DESC").fetchall()
-    return jsonify({"suites": [row_to_dict(r) for r in rows]})
+            cur = con.execute("SELECT * FROM suites ORDER BY created_at DESC")
+        rows = list(iter_dicts(cur))
+    resp = _json_response({"suites": rows})
+    resp.set_etag(etag)
+    return resp
 
 
 @app.post("/api/suites")
@@ -161,7 +280,7 @@ def post_suites() -> tuple[Any, int] | Any:
     project_id = str(body.get("project_id") or "").strip()
     name = str(body.get("name") or "").strip()
     if not project_id or not name:
-        return jsonify({"error": "missing project_id or name"}), 400
+        return _json_response({"error": "missing project_id or name"}, 400)
 
     sid = new_id("sui")
     with db_conn() as con:
@@ -170,7 +289,7 @@ def post_suites() -> tuple[Any, int] | Any:
             (sid, project_id, name, utc_now_iso()),
         )
         con.commit()
-    return jsonify({"suite": {"id": sid, "project_id": project_id, "name": name}}), 201
+    return _json_response({"suite": {"id": sid, "project_id": project_id, "name": name}}, 201)
 
 
 @app.delete("/api/suite/<suite_id>")
@@ -178,7 +297,7 @@ def del_suite(suite_id: str) -> Any:
     with db_conn() as con:
         con.execute("DELETE FROM suites WHERE id=?", (suite_id,))
         con.commit()
-    return jsonify({"ok": True})
+    return _json_response({"ok": True})
 
 
 @app.get("/api/cases")
@@ -195,16 +314,11 @@ def get_cases() -> Any:
         args.append(suite_id)
     sql += " ORDER BY updated_at DESC"
 
-    with db_conn() as con:
-        rows = con.execute(sql, tuple(args)).fetchall()
-
-    out = []
-    for r in rows:
-        d = row_to_dict(r)
+    def decode(d: dict[str, Any]) -> None:
         d["tags"] = json_loads(d.get("tags_json") or "[]", [])
         d["spec"] = json_loads(d.get("spec_json") or "{}", {})
-        out.append(d)
-    return jsonify({"cases": out})
+
+    return _stream_json_list("cases", sql, tuple(args), decode)
 
 
 @app.post("/api/cases")
@@ -213,7 +327,7 @@ def post_cases() -> tuple[Any, int] | Any:
     project_id = str(body.get("project_id") or "").strip()
     title = str(body.get("title") or "").strip()
     if not project_id or not title:
-        return jsonify({"error": "missing project_id or title"}), 400
+        return _json_response({"error": "missing project_id or title"}, 400)
 
     suite_id = str(body.get("suite_id") or "").strip() or None
     description = str(body.get("description") or "")
@@ -235,15 +349,15 @@ def post_cases() -> tuple[Any, int] | Any:
                 suite_id,
                 title,
                 description,
-                json.dumps(tags, ensure_ascii=True),
+                _json.dumps_text(tags),
                 kind,
-                json.dumps(spec, ensure_ascii=True),
+                _json.dumps_text(spec),
                 now,
                 now,
             ),
         )
         con.commit()
-    return jsonify({"case": {"id": cid}}), 201
+    return _json_response({"case": {"id": cid}}, 201)
 
 
 @app.put("/api/case/<case_id>")
@@ -252,7 +366,7 @@ def put_case(case_id: str) -> Any:
     with db_conn() as con:
         row = con.execute("SELECT * FROM cases WHERE id=?", (case_id,)).fetchone()
         if not row:
-            return jsonify({"error": "case not found"}), 404
+            return _json_response({"error": "case not found"}, 404)
 
         title = str(body.get("title") or row["title"]).strip()
         description = str(body.get("description") or row["description"])
@@ -272,25 +386,30 @@ def put_case(case_id: str) -> Any:
             suite_id = row["suite_id"]
         suite_id = (str(suite_id).strip() if suite_id is not None else None) or None
 
+        # Idempotent PUT: skip the write (and the updated_at bump) when nothing changed.
+        # tags/spec compare as decoded values: rows written by the stdlib server,
+        # the CLI or older builds use different JSON spacing and escaping.
+        if (suite_id, title, description, kind) == (
+            row["suite_id"],
+            row["title"],
+            row["description"],
+            row["kind"],
+        ) and (tags, spec) == (json_loads(str(row["tags_json"]), []), json_loads(str(row["spec_json"]), {})):
+            return _json_response({"ok": True, "unchanged": True})
+
+        tags_json = _json.dumps_text(tags)
+        spec_json = _json.dumps_text(spec)
+
         con.execute(
             """
             UPDATE cases
             SET suite_id=?, title=?, description=?, tags_json=?, kind=?, spec_json=?, updated_at=?
             WHERE id=?
             """,
-            (
-                suite_id,
-                title,
-                description,
-                json.dumps(tags, ensure_ascii=True),
-                kind,
-                json.dumps(spec, ensure_ascii=True),
-                utc_now_iso(),
-                case_id,
-            ),
+            (suite_id, title, description, tags_json, kind, spec_json, utc_now_iso(), case_id),
         )
         con.commit()
-    return jsonify({"ok": True})
+    return _json_response({"ok": True})
 
 
 @app.delete("/api/case/<case_id>")
@@ -298,7 +417,7 @@ def del_case(case_id: str) -> Any:
     with db_conn() as con:
         con.execute("DELETE FROM cases WHERE id=?", (case_id,))
         con.commit()
-    return jsonify({"ok": True})
+    return _json_response({"ok": True})
 
 
 @app.get("/api/runs")
@@ -315,15 +434,10 @@ def get_runs() -> Any:
         args.append(suite_id)
     sql += " ORDER BY created_at DESC"
 
-    with db_conn() as con:
-        rows = con.execute(sql, tuple(args)).fetchall()
-
-    out = []
-    for r in rows:
-        d = row_to_dict(r)
+    def decode(d: dict[str, Any]) -> None:
         d["summary"] = json_loads(d.get("summary_json") or "{}", {})
-        out.append(d)
-    return jsonify({"runs": out})
+
+    return _stream_json_list("runs", sql, tuple(args), decode)
 
 
 @app.get("/api/run/<run_id>")
@@ -331,17 +445,15 @@ def get_run(run_id: str) -> tuple[Any, int] | Any:
     with db_conn() as con:
         run = con.execute("SELECT * FROM runs WHERE id=?", (run_id,)).fetchone()
         if not run:
-            return jsonify({"error": "run not found"}), 404
-        items = con.execute("SELECT * FROM run_items WHERE run_id=? ORDER BY id", (run_id,)).fetchall()
+            return _json_response({"error": "run not found"}, 404)
+        items = list(iter_dicts(con.execute("SELECT * FROM run_items WHERE run_id=? ORDER BY id", (run_id,))))
 
     run_d = row_to_dict(run)
     run_d["summary"] = json_loads(run_d.get("summary_json") or "{}", {})
-    out_items = []
-    for it in items:
-        d = row_to_dict(it)
-        d["data"] = json_loads(d.get("data_json") or "{}", {})
-        out_items.append(d)
-    return jsonify({"run": run_d, "items": out_items})
+    loads = json_loads
+    for d in items:
+        d["data"] = loads(d.get("data_json") or "{}", {})
+    return _json_response({"run": run_d, "items": items})
 
 
 @app.post("/api/runs")
@@ -349,14 +461,14 @@ def post_runs() -> tuple[Any, int] | Any:
     body = _body()
     project_id = str(body.get("project_id") or "").strip()
     if not project_id:
-        return jsonify({"error": "missing project_id"}), 400
+        return _json_response({"error": "missing project_id"}, 400)
 
     suite_id = str(body.get("suite_id") or "").strip() or None
     name = str(body.get("name") or "Run").strip() or "Run"
     raw_case_ids = body.get("case_ids") if isinstance(body.get("case_ids"), list) else []
     case_ids = [str(x) for x in raw_case_ids if str(x)]
     if not case_ids:
-        return jsonify({"error": "missing case_ids"}), 400
+        return _json_response({"error": "missing case_ids"}, 400)
 
     rid = new_id("run")
     with db_conn() as con:
@@ -367,19 +479,19 @@ def post_runs() -> tuple[Any, int] | Any:
             """,
             (rid, project_id, suite_id, name, "queued", utc_now_iso(), None, None, "{}"),
         )
-        for cid in case_ids:
-            itid = new_id("ritem")
-            con.execute(
-                """
-                INSERT INTO run_items(id,run_id,case_id,status,duration_ms,log,data_json)
-                VALUES(?,?,?,?,?,?,?)
-                """,
-                (itid, rid, cid, "queued", 0, "", "{}"),
-            )
+        con.executemany(
+            """
+            INSERT INTO run_items(id,run_id,case_id,status,duration_ms,log,data_json)
+            VALUES(?,?,?,?,?,?,?)
+            """,
+            [(new_id("ritem"), rid, cid, "queued", 0, "", "{}") for cid in case_ids],
+        )
         con.commit()
 
-    final_status = _execute_run(rid)
-    return jsonify({"run": {"id": rid, "status": final_status}}), 201
+    if _RUN_INLINE:
+        return _json_response({"run": {"id": rid, "status": _execute_run(rid)}}, 201)
+    _RUN_EXECUTOR.submit(_execute_run, rid)
+    return _json_response({"run": {"id": rid, "status": "queued"}}, 202)
 
 
 @app.post("/api/ai/generate_cases")
@@ -397,28 +509,30 @@ def post_ai_generate_cases() -> Any:
     created_ids: list[str] = []
     if create and project_id:
         now = utc_now_iso()
+        created_ids = [new_id("case") for _ in suggestions[:30]]
+        rows = [
+            (
+                cid,
+                project_id,
+                suite_id,
+                s.title,
+                s.description,
+                _json.dumps_text(s.tags),
+                s.kind,
+                _json.dumps_text(s.spec),
+                now,
+                now,
+            )
+            for cid, s in zip(created_ids, suggestions)
+        ]
         with db_conn() as con:
-            for s in suggestions[:30]:
-                cid = new_id("case")
-                con.execute(
-                    """
-                    INSERT INTO cases(id,project_id,suite_id,title,description,tags_json,kind,spec_json,created_at,updated_at)
-                    VALUES(?,?,?,?,?,?,?,?,?,?)
-                    """,
-                    (
-                        cid,
-                        project_id,
-                        suite_id,
-                        s.title,
-                        s.description,
-                        json.dumps(s.tags, ensure_ascii=True),
-                        s.kind,
-                        json.dumps(s.spec, ensure_ascii=True),
-                        now,
-                        now,
-                    ),
-                )
-                created_ids.append(cid)
+            con.executemany(
+                """
+                INSERT INTO cases(id,project_id,suite_id,title,description,tags_json,kind,spec_json,created_at,updated_at)
+                VALUES(?,?,?,?,?,?,?,?,?,?)
+                """,
+                rows,
+            )
             con.commit()
 
     runtime = ai_runtime_status()
@@ -427,7 +541,7 @@ def post_ai_generate_cases() -> Any:
     runtime["mode"] = provider if model_provider else default_mode
     runtime["active_provider"] = provider
 
-    return jsonify(
+    return _json_response(
         {
             "suggestions": [
                 {
@@ -450,19 +564,60 @@ def post_ai_generate_cases() -> Any:
     )
 
 
+@app.post("/api/ai/generate_cases_batch")
+def post_ai_generate_cases_batch() -> Any:
+    body = _body()
+    raw_prompts = body.get("prompts") if isinstance(body.get("prompts"), list) else []
+    prompts = [str(p or "") for p in raw_prompts]
+    if not prompts:
+        return _json_response({"error": "missing prompts"}, 400)
+    if len(prompts) > GENERATE_BATCH_MAX_PROMPTS:
+        return _json_response({"error": f"too many prompts (max {GENERATE_BATCH_MAX_PROMPTS})"}, 400)
+    model_provider = str(body.get("model_provider") or "").strip().lower() or None
+
+    t0 = time.monotonic()
+    results = generate_cases_batch(prompts, model_provider=model_provider)
+    elapsed_ms = int((time.monotonic() - t0) * 1000)
+    return _json_response(
+        {
+            "results": [
+                {
+                    "suggestions": [
+                        {
+                            "title": s.title,
+                            "description": s.description,
+                            "tags": s.tags,
+                            "kind": s.kind,
+                            "spec": s.spec,
+                            "test_case": professional_case_from_suggested(s),
+                        }
+                        for s in suggestions
+                    ],
+                    "provider": provider,
+                    "warning": warning,
+                }
+                for suggestions, provider, warning in results
+            ],
+            "requested_provider": model_provider,
+            "elapsed_ms": elapsed_ms,
+        }
+    )
+
+
 @app.get("/api/test")
 def test() -> Any:
-    return jsonify({"status": "success", "message": "Flask is running on laitest.tech"})
+    return _json_response({"status": "success", "message": "Flask is running on laitest.tech"})
 
 
 @app.errorhandler(404)
 def _not_found(_: Exception) -> tuple[Any, int]:
     if request.path.startswith("/api/"):
-        return jsonify({"error": "not found"}), 404
-    return jsonify({"error": "not found"}), 404
+        return _json_response({"error": "not found"}, 404)
+    return _json_response({"error": "not found"}, 404)
 
 
 @app.errorhandler(Exception)
 def _handle_error(e: Exception) -> tuple[Any, int]:
     tb = traceback.format_exc(limit=20)
-    return jsonify({"error": f"{e.__class__.__name__}: {e}", "trace": tb}), 500
+    return _json_response({"error": f"{e.__class__.__name__}: {e}", "trace": tb}, 500)
+
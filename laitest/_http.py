@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import functools
+import http.client
+import io
+import queue
+import select
+import ssl
+import threading
+import urllib.request
+from urllib import error
+from urllib.parse import urlsplit
+
+# Keep-alive connections per (scheme, host, port), so repeated model calls skip
+# the TCP + TLS handshake that a fresh urlopen() pays every time.
+_POOL_SIZE = 4
+_POOLS: dict[tuple[str, str, int], queue.LifoQueue[http.client.HTTPConnection]] = {}
+_POOLS_LOCK = threading.Lock()
+_SSL_CONTEXT: ssl.SSLContext | None = None
+
+# A pooled connection the server closed while it sat idle fails either while
+# the request is sent or, more often, when the status line is read back.
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+
+def _ssl_context() -> ssl.SSLContext:
+    global _SSL_CONTEXT
+    if _SSL_CONTEXT is None:
+        _SSL_CONTEXT = ssl.create_default_context()
+    return _SSL_CONTEXT
+
+
+def _pool(key: tuple[str, str, int]) -> queue.LifoQueue[http.client.HTTPConnection]:
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.setdefault(key, queue.LifoQueue(maxsize=_POOL_SIZE))
+    return pool
+
+
+def _new_connection(key: tuple[str, str, int], timeout: float) -> http.client.HTTPConnection:
+    scheme, host, port = key
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, port, timeout=timeout, context=_ssl_context())
+    return http.client.HTTPConnection(host, port, timeout=timeout)
+
+
+@functools.lru_cache(maxsize=64)
+def _proxied(scheme: str, host: str) -> bool:
+    # Same rules urlopen() applies: *_PROXY for the scheme, minus NO_PROXY hosts.
+    return bool(urllib.request.getproxies().get(scheme)) and not urllib.request.proxy_bypass(host)
+
+
+def _is_dead(conn: http.client.HTTPConnection) -> bool:
+    # An idle keep-alive socket has nothing to read; readable means the peer
+    # sent EOF (or a TLS close_notify), so the connection cannot be reused.
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+def _release(pool: queue.LifoQueue[http.client.HTTPConnection], conn: http.client.HTTPConnection) -> None:
+    try:
+        pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+
+def request(
+    method: str,
+    url: str,
+    body: bytes | None = None,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30.0,
+) -> bytes:
+    """
+    Minimal keep-alive replacement for `urlopen(req).read()`.
+
+    Mirrors urlopen's error surface: connect/send failures (and a connection
+    dropped before the response status) raise `urllib.error.URLError`, non-2xx
+    statuses raise `urllib.error.HTTPError` (with a readable body), and
+    read-phase errors propagate unchanged. Pooled sockets the server has
+    closed are discarded, or the request is replayed once on a fresh one.
+    Hosts that HTTP(S)_PROXY routes through a proxy go through urlopen()
+    itself (no pooling), so proxied deployments keep working.
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https"):
+        raise ValueError(f"unsupported url scheme: {parts.scheme}")
+    if _proxied(scheme, parts.hostname or ""):
+        req = urllib.request.Request(url, data=body, headers=headers or {}, method=method)
+        with urllib.request.urlopen(req, timeout=timeout) as resp:  # nosec - fixed upstream endpoint
+            return resp.read()
+    key = (scheme, parts.hostname or "", parts.port or (443 if scheme == "https" else 80))
+    path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    pool = _pool(key)
+
+    replayed = False
+    while True:
+        conn: http.client.HTTPConnection | None = None
+        if not replayed:
+            try:
+                conn = pool.get_nowait()
+            except queue.Empty:
+                pass
+        reused = conn is not None
+        if conn is None:
+            conn = _new_connection(key, timeout)
+        if reused and _is_dead(conn):
+            conn.close()
+            continue
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+
+        try:
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+            except OSError as err:
+                if reused and isinstance(err, _STALE_ERRORS):
+                    conn.close()
+                    continue
+                raise error.URLError(err) from err
+            try:
+                resp = conn.getresponse()
+            except _STALE_ERRORS as err:
+                # No response byte arrived on a reused socket: the server
+                # closed it while idle and never handled the request, so it is
+                # replayed once on a fresh connection. Anything else (a fresh
+                # connection, or a second drop) is left to the caller's retry.
+                conn.close()
+                if reused and not replayed:
+                    replayed = True
+                    continue
+                raise error.URLError(err) from err
+            data = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            _release(pool, conn)
+
+        if not 200 <= resp.status < 300:
+            raise error.HTTPError(url, resp.status, resp.reason, resp.msg, io.BytesIO(data))
+        return data
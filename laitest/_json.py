@@ -0,0 +1,100 @@
+"""
+JSON helpers with an optional orjson (or parse-only simdjson) fast path,
+enabled by LAITEST_FAST_JSON=1.
+
+Decoding gives the same values either way (whatever orjson rejects goes to
+stdlib). Encoding with orjson active is valid JSON but not byte-identical to
+the stdlib path:
+- non-ASCII text is written as raw UTF-8 instead of \\uXXXX escapes;
+- NaN and +/-Infinity are written as null (stdlib writes the NaN/Infinity
+  literals), so such a float comes back as None.
+Compare stored *_json columns as decoded values, not as text.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any
+
+try:  # Optional accelerator; laitest itself stays stdlib-only.
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None  # type: ignore[assignment]
+
+try:  # Parse-only accelerator, used when orjson is not available.
+    import simdjson
+except ImportError:  # pragma: no cover - depends on environment
+    simdjson = None  # type: ignore[assignment]
+
+
+def _flag_enabled() -> bool:
+    flag = os.environ.get("LAITEST_FAST_JSON", "0").strip().lower()
+    return flag in ("1", "true", "yes", "on")
+
+
+FAST = _flag_enabled() and orjson is not None
+FAST_LOADS = FAST or (_flag_enabled() and simdjson is not None)
+
+# simdjson.Parser reuses its internal buffers and is not thread-safe.
+_local = threading.local()
+
+
+def _simdjson_parser() -> Any:
+    p = getattr(_local, "parser", None)
+    if p is None:
+        p = _local.parser = simdjson.Parser()
+    return p
+
+
+def dumps(obj: Any) -> bytes:
+    if FAST:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson is stricter than stdlib (non-str keys, ints beyond 64 bits).
+            pass
+    return json.dumps(obj, ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_utf8(obj: Any) -> bytes:
+    # Outgoing request bodies: raw UTF-8 instead of \uXXXX escapes, which halves
+    # CJK prompts on the wire and is the faster stdlib encoder path.
+    if FAST:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    try:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    except UnicodeEncodeError:
+        # Lone surrogates cannot be UTF-8 encoded; ASCII escapes keep them valid JSON.
+        return json.dumps(obj, ensure_ascii=True, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_text(obj: Any) -> str:
+    # SQLite *_json columns are TEXT.
+    if FAST:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=True, separators=(",", ":"))
+
+
+def loads(data: str | bytes | bytearray) -> Any:
+    if FAST:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Let stdlib decide: it also accepts NaN/Infinity.
+            pass
+    elif FAST_LOADS:
+        raw = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        try:
+            # recursive=True materialises plain dict/list, no proxies outlive the buffer.
+            return _simdjson_parser().parse(raw, recursive=True)
+        except ValueError:
+            pass
+    return json.loads(data)
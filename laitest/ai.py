@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+import functools
 import hashlib
 import json
 import os
+import random
 import re
 import socket
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from http.client import IncompleteRead, RemoteDisconnected
-from typing import Any
-from urllib import error, request
+from itertools import islice
+from typing import Any, Callable, TypeVar
+from urllib import error
 
+from . import _http, _json
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class SuggestedCase:
     title: str
     description: str
@@ -21,20 +30,30 @@ class SuggestedCase:
     spec: dict[str, Any]
 
 
-_ALLOWED_PRIORITIES = {"P0", "P1", "P2", "P3"}
-_ALLOWED_TYPES = {
-    "functional",
-    "boundary",
-    "negative",
-    "security",
-    "performance",
-    "compatibility",
-    "api",
-}
+_ALLOWED_PRIORITIES = frozenset({"P0", "P1", "P2", "P3"})
+_ALLOWED_TYPES = frozenset(
+    {
+        "functional",
+        "boundary",
+        "negative",
+        "security",
+        "performance",
+        "compatibility",
+        "api",
+    }
+)
+_ALLOWED_KINDS = frozenset({"http", "demo"})
+_FUNCTIONAL_TYPES = frozenset({"functional", "boundary", "negative", "api"})
+# Transient upstream statuses worth another attempt.
+_RETRY_HTTP_CODES = frozenset({500, 502, 503, 504})
 
 _GEMINI_MODEL_CACHE: dict[str, str] = {}
 _GEMINI_API_VERSION_CACHE: dict[str, str] = {}
 _CJK_RE = re.compile(r"[\u3400-\u9FFF]")
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+_WS_RUN_RE = re.compile(r"\s+")
+# ASCII fast path for _slug_token: every non [A-Za-z0-9] byte becomes "-".
+_SLUG_TABLE = bytes(c if c < 128 and chr(c).isalnum() else 0x2D for c in range(256))
 
 _EN_TEXT_EXACT_MAP: dict[str, str] = {
     "prepare test data and preconditions": "准备测试前置条件与测试数据",
@@ -62,44 +81,64 @@ _EN_TEXT_EXACT_MAP: dict[str, str] = {
     "verify response and side effects": "校验响应和副作用",
     "generated from requirement text": "根据需求文本生成",
 }
+_EN_TEXT_EXACT_MAX_LEN = max(map(len, _EN_TEXT_EXACT_MAP))
 
+# Whole-word, case-insensitive; the \b anchors are added once around the
+# combined alternation below.
 _EN_TOKEN_REPLACEMENTS: list[tuple[str, str]] = [
-    (r"\bverification code\b|\botp\b|\bcaptcha\b", "验证码"),
-    (r"\blogin\b|\bsign in\b|\bauthentication\b|\bauthenticate\b|\bauth\b", "登录"),
-    (r"\bpassword\b", "密码"),
-    (r"\busername\b", "用户名"),
-    (r"\bphone number\b|\bmobile\b", "手机号"),
-    (r"\buser\b", "用户"),
-    (r"\baccount\b", "账号"),
-    (r"\bsuccessful\b|\bsuccess\b", "成功"),
-    (r"\bfailed\b|\bfailure\b|\bfail\b", "失败"),
-    (r"\binvalid\b", "无效"),
-    (r"\berror\b", "错误"),
-    (r"\brequest\b", "请求"),
-    (r"\bresponse\b", "响应"),
-    (r"\bexpected result\b", "预期结果"),
-    (r"\bpreconditions?\b", "前置条件"),
-    (r"\bsteps?\b", "步骤"),
-    (r"\bmodule\b", "模块"),
-    (r"\bsystem\b", "系统"),
-    (r"\bboundary\b", "边界"),
-    (r"\bsecurity\b", "安全"),
-    (r"\bperformance\b", "性能"),
-    (r"\bapi\b", "接口"),
-    (r"\bverify\b", "校验"),
-    (r"\bprepare\b", "准备"),
-    (r"\binput\b", "输入"),
-    (r"\boutput\b", "输出"),
-    (r"\breset\b", "重置"),
-    (r"\btest data\b", "测试数据"),
-    (r"\bscenario\b", "场景"),
-    (r"\bexecute\b", "执行"),
-    (r"\bobserve\b", "观察"),
-    (r"\bstate changes?\b", "状态变化"),
-    (r"\bprocess(es|ed)?\b", "处理"),
-    (r"\breject(s|ed)?\b", "拒绝"),
+    (r"verification code|otp|captcha", "验证码"),
+    (r"login|sign in|authentication|authenticate|auth", "登录"),
+    (r"password", "密码"),
+    (r"username", "用户名"),
+    (r"phone number|mobile", "手机号"),
+    (r"user", "用户"),
+    (r"account", "账号"),
+    (r"successful|success", "成功"),
+    (r"failed|failure|fail", "失败"),
+    (r"invalid", "无效"),
+    (r"error", "错误"),
+    (r"request", "请求"),
+    (r"response", "响应"),
+    (r"expected result", "预期结果"),
+    (r"preconditions?", "前置条件"),
+    (r"steps?", "步骤"),
+    (r"module", "模块"),
+    (r"system", "系统"),
+    (r"boundary", "边界"),
+    (r"security", "安全"),
+    (r"performance", "性能"),
+    (r"api", "接口"),
+    (r"verify", "校验"),
+    (r"prepare", "准备"),
+    (r"input", "输入"),
+    (r"output", "输出"),
+    (r"reset", "重置"),
+    (r"test data", "测试数据"),
+    (r"scenario", "场景"),
+    (r"execute", "执行"),
+    (r"observe", "观察"),
+    (r"state changes?", "状态变化"),
+    (r"process(?:es|ed)?", "处理"),
+    (r"reject(?:s|ed)?", "拒绝"),
 ]
 
+# All replacements in one left-to-right pass, dispatched on the matching
+# group. N/A stays case-sensitive (only "N/A" / "n/a") and, as when it was
+# replaced after the tokens, loses to a token starting at its "A" (".../Auth").
+_EN_TOKEN_WORDS = r"\b(?:" + "|".join(pat for pat, _ in _EN_TOKEN_REPLACEMENTS) + r")\b"
+_EN_TOKEN_REPL = [repl for _, repl in _EN_TOKEN_REPLACEMENTS] + ["无"]
+_EN_TOKEN_RE = re.compile(
+    r"\b(?:"
+    + "|".join(f"(?P<g{i}>{pat})" for i, (pat, _) in enumerate(_EN_TOKEN_REPLACEMENTS))
+    + r")\b"
+    + f"|(?P<g{len(_EN_TOKEN_REPLACEMENTS)}>(?-i:N/(?=A)|n/(?=a))(?!{_EN_TOKEN_WORDS}).)",
+    re.IGNORECASE,
+)
+
+
+def _en_token_repl(m: re.Match[str]) -> str:
+    return _EN_TOKEN_REPL[int(m.lastgroup[1:])]
+
 
 def _env_first(*keys: str) -> str:
     for k in keys:
@@ -109,50 +148,77 @@ def _env_first(*keys: str) -> str:
     return ""
 
 
+@functools.lru_cache(maxsize=64)
+def _safe_int_env(name: str, default: int, min_v: int, max_v: int) -> int:
+    try:
+        value = int(os.environ.get(name, str(default)) or str(default))
+    except Exception:
+        value = default
+    if value < min_v:
+        return min_v
+    if value > max_v:
+        return max_v
+    return value
+
+
 def _clean_text(value: Any, default: str = "", max_len: int = 300) -> str:
-    s = str(value or "").strip()
+    if not value:
+        return default
+    s = str(value).strip()
     if not s:
         return default
     return s[:max_len]
 
 
-def _clean_list_str(value: Any, default: list[str] | None = None, max_items: int = 20) -> list[str]:
+_DEFAULT_PRECONDITIONS = ("系统可访问", "测试账号与测试数据已准备好")
+
+
+def _clean_list_str(value: Any, default: tuple[str, ...] = (), max_items: int = 20) -> list[str]:
+    # Defaults are tuples, so the shared value can never be mutated by a caller.
     if not isinstance(value, list):
-        return list(default or [])
-    out: list[str] = []
-    for row in value[:max_items]:
-        text = _clean_text(row, "")
-        if text:
-            out.append(text)
-    return out or list(default or [])
+        return list(default)
+    clean = _clean_text
+    out = [text for row in islice(value, max_items) if (text := clean(row, ""))]
+    return out or list(default)
 
 
 def _contains_cjk(value: Any) -> bool:
-    return bool(_CJK_RE.search(str(value or "")))
+    s = str(value or "")
+    return not s.isascii() and _CJK_RE.search(s) is not None
+
+
+# Every byte that is not [A-Za-z]; deleting these leaves only the Latin letters.
+_NON_LATIN_BYTES = bytes(c for c in range(256) if not (0x41 <= c <= 0x5A or 0x61 <= c <= 0x7A))
+
+
+def _cjk_latin_counts(s: str) -> tuple[int, int]:
+    latin = len(s.encode("ascii", "ignore").translate(None, _NON_LATIN_BYTES))
+    cjk = 0 if s.isascii() else len(_CJK_RE.findall(s))
+    return cjk, latin
+
+
+def _latin_outweighs(cjk: int, latin: int) -> bool:
+    return latin >= 4 and latin > max(cjk // 2, 1)
 
 
 def _has_heavy_latin(value: Any) -> bool:
     s = str(value or "")
-    latin = len(re.findall(r"[A-Za-z]", s))
-    cjk = len(re.findall(r"[\u3400-\u9FFF]", s))
-    return latin >= 4 and latin > max(cjk // 2, 1)
+    latin = len(s.encode("ascii", "ignore").translate(None, _NON_LATIN_BYTES))
+    if latin < 4:
+        return False
+    cjk = 0 if s.isascii() else len(_CJK_RE.findall(s))
+    return _latin_outweighs(cjk, latin)
+
+
+# "in english" already covers "output/return/respond in english".
+_EN_REQUEST_RE = re.compile(
+    r"in english|use english|english only|英文输出|输出英文|英语输出|用英文",
+    re.ASCII | re.IGNORECASE,
+)
 
 
 def _prompt_requests_english(prompt: str) -> bool:
-    low = (prompt or "").lower()
-    markers = [
-        "output in english",
-        "return in english",
-        "respond in english",
-        "use english",
-        "english only",
-        "in english",
-        "英文输出",
-        "输出英文",
-        "英语输出",
-        "用英文",
-    ]
-    return any(m in low for m in markers)
+    return bool(prompt and _EN_REQUEST_RE.search(prompt))
 
 
 def _to_zh_text(
@@ -161,31 +227,103 @@ def _to_zh_text(
     max_len: int = 400,
     force_default_on_non_cjk: bool = False,
 ) -> str:
+    # Generated cases repeat the same boilerplate fields; str inputs are cached.
+    if type(value) is str:
+        return _zh_text_from(value, default, max_len, force_default_on_non_cjk)
+    return _zh_text_from.__wrapped__(value, default, max_len, force_default_on_non_cjk)
+
+
+@functools.lru_cache(maxsize=2048)
+def _zh_text_from(value: Any, default: str, max_len: int, force_default_on_non_cjk: bool) -> str:
     s = _clean_text(value, default, max_len)
     if not s:
         return default
     if _contains_cjk(s):
         return s
 
-    mapped = _EN_TEXT_EXACT_MAP.get(s.strip().lower())
+    # s is already left-stripped; a lowered key is never shorter than its source,
+    # so long texts cannot hit the map and skip the lower() copy entirely.
+    mapped = _EN_TEXT_EXACT_MAP.get(s)
+    if mapped is None:
+        key = s.rstrip()
+        if len(key) <= _EN_TEXT_EXACT_MAX_LEN:
+            mapped = _EN_TEXT_EXACT_MAP.get(key.lower())
     if mapped:
         return mapped[:max_len]
 
-    out = s
-    for pat, repl in _EN_TOKEN_REPLACEMENTS:
-        out = re.sub(pat, repl, out, flags=re.IGNORECASE)
-    out = out.replace("N/A", "无").replace("n/a", "无")
+    out = _EN_TOKEN_RE.sub(_en_token_repl, s)
 
-    if _contains_cjk(out):
-        if force_default_on_non_cjk and default and _has_heavy_latin(out):
-            return _clean_text(default, default, max_len)
+    if not (force_default_on_non_cjk and default):
+        return out[:max_len] if _contains_cjk(out) else s
+    # One sweep yields both counts for the CJK check and the Latin-weight check.
+    cjk, latin = _cjk_latin_counts(out)
+    if cjk and not _latin_outweighs(cjk, latin):
         return out[:max_len]
-    if force_default_on_non_cjk and default:
-        return _clean_text(default, default, max_len)
-    return s
+    return _clean_text(default, default, max_len)
+
+
+# (tag, module, keywords) shared by _to_zh_module and _infer_local_profile.
+_LOCAL_DOMAIN_FAMILIES = (
+    ("auth", "登录认证", ("login", "sign in", "auth", "登录", "鉴权", "认证")),
+    ("payment", "支付结算", ("payment", "checkout", "refund", "支付", "结算", "退款")),
+    ("api", "接口", ("api", "接口")),
+)
+
+_KW_NEGATIVE_EN = ("error", "fail", "invalid", "forbidden", "denied")
+_KW_NEGATIVE_ZH = ("失败", "错误", "异常", "非法", "拒绝")
+_KW_BOUNDARY_EN = ("boundary", "limit", "max", "min", "empty", "null")
+_KW_BOUNDARY_ZH = ("边界", "上限", "下限", "为空", "空值", "长度")
+_KW_COMPAT_EN = ("ui", "compatibility", "compliance", "copywriting")
+_KW_COMPAT_ZH = ("界面", "兼容", "合规", "文案", "多端")
+_KW_RESILIENCE_EN = ("resilience", "fault", "chaos", "timeout", "retry", "degrade")
+_KW_RESILIENCE_ZH = ("容错", "网络波动", "宕机", "降级", "超时", "重试", "故障恢复")
+_KW_SECURITY_EN = ("security", "permission", "csrf", "xss", "sql injection")
+_KW_SECURITY_ZH = ("安全", "权限", "注入", "越权", "风控")
+_KW_PERFORMANCE_EN = ("performance", "load", "stress", "latency")
+_KW_PERFORMANCE_ZH = ("性能", "并发", "压测", "延迟")
+
+# (family, case_type, priority or None, expected, keywords) for _infer_local_profile,
+# in precedence order: a later matching family overrides the earlier ones.
+_LOCAL_CASE_FAMILIES = (
+    ("negative", "negative", None, "系统拒绝非法输入并返回明确错误信息。", _KW_NEGATIVE_EN + _KW_NEGATIVE_ZH),
+    ("boundary", "boundary", None, "系统可正确处理边界输入，且不破坏约束。", _KW_BOUNDARY_EN + _KW_BOUNDARY_ZH),
+    ("compat", "compatibility", None, "界面展示、文案与多端兼容性符合规范要求。", _KW_COMPAT_EN + _KW_COMPAT_ZH),
+    (
+        "resilience",
+        "negative",
+        None,
+        "系统在异常条件下具备可观测、可恢复的容错能力。",
+        _KW_RESILIENCE_EN + _KW_RESILIENCE_ZH,
+    ),
+    ("security", "security", "P0", "安全控制有效拦截风险行为，并产生可审计结果。", _KW_SECURITY_EN + _KW_SECURITY_ZH),
+    ("performance", "performance", "P1", "响应时间与吞吐量满足既定性能目标。", _KW_PERFORMANCE_EN + _KW_PERFORMANCE_ZH),
+)
+
+# keyword -> family for every table above; one scan of the lowered line finds
+# them all (lower() leaves CJK untouched, so Chinese keywords match as before).
+_LOCAL_KW: dict[str, str] = {kw: tag for tag, _, kws in _LOCAL_DOMAIN_FAMILIES for kw in kws}
+_LOCAL_KW.update({kw: fam for fam, _, _, _, kws in _LOCAL_CASE_FAMILIES for kw in kws})
+# Zero-width lookahead so overlapping keywords are all seen; plain substring
+# semantics (no word boundaries), matching the previous `k in low` checks.
+# Only one keyword is reported per start position, so no keyword may be a
+# prefix of another family's keyword.
+_LOCAL_KW_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_LOCAL_KW, key=len, reverse=True)) + "))"
+)
+
+
+def _local_families(low: str) -> set[str]:
+    return {_LOCAL_KW[m.group(1)] for m in _LOCAL_KW_RE.finditer(low)}
 
 
 def _to_zh_module(value: Any) -> str:
+    if type(value) is str:
+        return _zh_module_from(value)
+    return _zh_module_from.__wrapped__(value)
+
+
+@functools.lru_cache(maxsize=512)
+def _zh_module_from(value: Any) -> str:
     raw = _clean_text(value, "", 80)
     if not raw:
         return "通用模块"
@@ -193,12 +331,12 @@ def _to_zh_module(value: Any) -> str:
         return raw
 
     low = raw.lower()
-    if any(k in low for k in ["login", "sign in", "auth"]):
-        return "登录认证"
-    if any(k in low for k in ["payment", "checkout", "refund"]):
-        return "支付结算"
-    if "api" in low:
-        return "接口"
+    hits = _local_families(low)
+    if hits:
+        # Unlike _infer_local_profile, the first matching family wins here.
+        for tag, family_module, _ in _LOCAL_DOMAIN_FAMILIES:
+            if tag in hits:
+                return family_module
     if low in {"general", "common", "default", "misc"}:
         return "通用模块"
 
@@ -208,28 +346,58 @@ def _to_zh_module(value: Any) -> str:
     return "通用模块"
 
 
-def _normalize_priority(value: Any) -> str:
+# Models repeat a handful of priority/type spellings across every row; only
+# str inputs are cached (lists/dicts from malformed rows are unhashable).
+@functools.lru_cache(maxsize=256)
+def _priority_from(value: Any) -> str:
     p = _clean_text(value, "P1", 8).upper()
     if p in _ALLOWED_PRIORITIES:
         return p
     return "P1"
 
 
-def _normalize_case_type(value: Any) -> str:
+@functools.lru_cache(maxsize=256)
+def _case_type_from(value: Any) -> str:
     t = _clean_text(value, "functional", 40).lower()
     if t in _ALLOWED_TYPES:
         return t
     return "functional"
 
 
+def _normalize_priority(value: Any) -> str:
+    if type(value) is str:
+        return _priority_from(value)
+    return _priority_from.__wrapped__(value)
+
+
+def _normalize_case_type(value: Any) -> str:
+    if type(value) is str:
+        return _case_type_from(value)
+    return _case_type_from.__wrapped__(value)
+
+
+def _slug_ascii(raw: bytes) -> str:
+    # split/join collapses runs and trims the ends in one bounded pass.
+    slug = b"-".join(filter(None, raw.translate(_SLUG_TABLE).split(b"-")))
+    return slug.upper().decode("ascii") or "CASE"
+
+
 def _slug_token(text: str) -> str:
-    slug = re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-").upper()
+    if text.isascii():
+        return _slug_ascii(text.encode("ascii"))
+    slug = _SLUG_RE.sub("-", text).strip("-").upper()
     return slug or "CASE"
 
 
 def _make_case_id(title: str) -> str:
-    token = _slug_token(title)[:20]
-    digest = hashlib.sha1(title.encode("utf-8", errors="ignore")).hexdigest()[:6].upper()
+    # Encode once: ASCII titles slug and hash the same bytes.
+    if title.isascii():
+        raw = title.encode("ascii")
+        token = _slug_ascii(raw)[:20]
+    else:
+        raw = title.encode("utf-8", errors="ignore")
+        token = _slug_token(title)[:20]
+    digest = hashlib.blake2b(raw, digest_size=3).hexdigest().upper()
     return f"TC-{token}-{digest}"
 
 
@@ -238,17 +406,23 @@ def _normalize_professional_steps(raw: Any) -> list[dict[str, Any]]:
         return []
 
     out: list[dict[str, Any]] = []
-    for i, row in enumerate(raw[:20]):
+    clean = _clean_text
+    for i, row in enumerate(islice(raw, 20)):
         if isinstance(row, dict):
-            action = _clean_text(row.get("action") or row.get("step") or row.get("description"), "")
-            test_data = _clean_text(row.get("test_data") or row.get("data"), "")
-            expected = _clean_text(row.get("expected_result") or row.get("expected"), "")
-            try:
-                step_no = int(row.get("step_no") or row.get("no") or (i + 1))
-            except Exception:
+            g = row.get
+            action = clean(g("action") or g("step") or g("description"), "")
+            test_data = clean(g("test_data") or g("data"), "")
+            expected = clean(g("expected_result") or g("expected"), "")
+            step_no = g("step_no") or g("no")
+            if not step_no:
                 step_no = i + 1
+            elif type(step_no) is not int:
+                try:
+                    step_no = int(step_no)
+                except Exception:
+                    step_no = i + 1
         else:
-            action = _clean_text(row, "")
+            action = clean(row, "")
             test_data = ""
             expected = ""
             step_no = i + 1
@@ -293,11 +467,11 @@ def _fallback_professional_steps(title: str, expected_result: str) -> list[dict[
 
 def _to_execution_steps(pro_case: dict[str, Any]) -> list[dict[str, Any]]:
     steps = pro_case.get("steps")
-    if not isinstance(steps, list):
-        steps = []
+    if not isinstance(steps, list) or not steps:
+        return [{"type": "pass", "message": "根据需求生成"}]
 
     out: list[dict[str, Any]] = []
-    for row in steps[:10]:
+    for row in islice(steps, 10):
         if not isinstance(row, dict):
             continue
         no = row.get("step_no")
@@ -316,30 +490,31 @@ def _to_execution_steps(pro_case: dict[str, Any]) -> list[dict[str, Any]]:
 
 
 def _normalize_professional_case(obj: dict[str, Any], title: str, tags: list[str]) -> dict[str, Any]:
-    module = _clean_text(obj.get("module"), "通用模块", 80)
-    priority = _normalize_priority(obj.get("priority"))
-    case_type = _normalize_case_type(obj.get("type"))
+    g = obj.get
+    module = _clean_text(g("module"), "通用模块", 80)
+    priority = _normalize_priority(g("priority"))
+    case_type = _normalize_case_type(g("type"))
     preconditions = _clean_list_str(
-        obj.get("preconditions"),
-        default=["系统可访问", "测试账号与测试数据已准备好"],
+        g("preconditions"),
+        default=_DEFAULT_PRECONDITIONS,
         max_items=10,
     )
 
     expected_result = _clean_text(
-        obj.get("expected_result"),
+        g("expected_result"),
         default="系统行为符合预期结果。",
         max_len=400,
     )
 
-    steps = _normalize_professional_steps(obj.get("steps"))
+    steps = _normalize_professional_steps(g("steps"))
     if not steps:
         steps = _fallback_professional_steps(title=title, expected_result=expected_result)
 
-    case_id = _clean_text(obj.get("case_id"), "", 80)
+    case_id = _clean_text(g("case_id"), "", 80)
     if not case_id:
         case_id = _make_case_id(title)
 
-    automation_candidate = bool(obj.get("automation_candidate", True))
+    automation_candidate = bool(g("automation_candidate", True))
 
     return {
         "case_id": case_id,
@@ -355,13 +530,26 @@ def _normalize_professional_case(obj: dict[str, Any], title: str, tags: list[str
     }
 
 
+# Top-level row fields that override the nested professional test case.
+_CASE_MERGE_KEYS = (
+    "case_id",
+    "module",
+    "priority",
+    "type",
+    "preconditions",
+    "steps",
+    "expected_result",
+    "automation_candidate",
+)
+
+
 def _normalize_case(obj: dict[str, Any]) -> SuggestedCase | None:
     title = _clean_text(obj.get("title"), "")
     if not title:
         return None
 
     description = _clean_text(obj.get("description"), "（自动）根据需求生成", 500)
-    tags = _clean_list_str(obj.get("tags"), default=[], max_items=12)
+    tags = _clean_list_str(obj.get("tags"), max_items=12)
 
     automation = obj.get("automation")
     raw_spec: Any = None
@@ -372,32 +560,20 @@ def _normalize_case(obj: dict[str, Any]) -> SuggestedCase | None:
     else:
         kind = _clean_text(obj.get("kind"), "demo", 20).lower()
         raw_spec = obj.get("spec")
-    if kind not in ("http", "demo"):
+    if kind not in _ALLOWED_KINDS:
         kind = "demo"
 
     if not isinstance(raw_spec, dict):
         raw_spec = {}
 
-    merged_case: dict[str, Any] = {}
+    # Precedence: top-level fields > test_case > spec.professional_case.
     test_case_obj = obj.get("test_case")
-    if isinstance(test_case_obj, dict):
-        merged_case.update(test_case_obj)
-    for key in (
-        "case_id",
-        "module",
-        "priority",
-        "type",
-        "preconditions",
-        "steps",
-        "expected_result",
-        "automation_candidate",
-    ):
-        if key in obj and obj.get(key) not in (None, ""):
-            merged_case[key] = obj.get(key)
-
     pro_from_spec = raw_spec.get("professional_case")
-    if isinstance(pro_from_spec, dict):
-        merged_case = {**pro_from_spec, **merged_case}
+    merged_case: dict[str, Any] = {
+        **(pro_from_spec if isinstance(pro_from_spec, dict) else {}),
+        **(test_case_obj if isinstance(test_case_obj, dict) else {}),
+        **{k: v for k in _CASE_MERGE_KEYS if (v := obj.get(k)) not in (None, "")},
+    }
 
     pro_case = _normalize_professional_case(merged_case, title=title, tags=tags)
 
@@ -442,16 +618,12 @@ def _normalize_cases_payload(payload: Any) -> list[SuggestedCase]:
     else:
         rows = []
 
-    out: list[SuggestedCase] = []
-    for row in rows[:50]:
-        if not isinstance(row, dict):
-            continue
-        s = _normalize_case(row)
-        if s is not None:
-            out.append(s)
-    return out
+    normalize = _normalize_case
+    # islice: no copy of the row list, whether or not it is over the cap.
+    return [s for row in islice(rows, 50) if isinstance(row, dict) and (s := normalize(row)) is not None]
 
 
+@functools.lru_cache(maxsize=1)
 def _gemini_model() -> str:
     raw = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash").strip() or "gemini-2.0-flash"
     if raw.startswith("models/"):
@@ -459,6 +631,7 @@ def _gemini_model() -> str:
     return raw
 
 
+@functools.lru_cache(maxsize=1)
 def _deepseek_model() -> str:
     raw = os.environ.get("DEEPSEEK_MODEL", "deepseek-chat").strip() or "deepseek-chat"
     if raw.startswith("models/"):
@@ -466,6 +639,7 @@ def _deepseek_model() -> str:
     return raw
 
 
+@functools.lru_cache(maxsize=1)
 def _qianwen_model() -> str:
     raw = os.environ.get("QIANWEN_MODEL", "qwen-plus").strip() or "qwen-plus"
     if raw.startswith("models/"):
@@ -473,10 +647,12 @@ def _qianwen_model() -> str:
     return raw
 
 
+@functools.lru_cache(maxsize=1)
 def _deepseek_base_url() -> str:
     return (os.environ.get("DEEPSEEK_BASE_URL", "https://api.deepseek.com").strip() or "https://api.deepseek.com").rstrip("/")
 
 
+@functools.lru_cache(maxsize=1)
 def _deepseek_chat_url() -> str:
     base = _deepseek_base_url()
     if base.endswith("/chat/completions"):
@@ -486,23 +662,20 @@ def _deepseek_chat_url() -> str:
     return f"{base}/v1/chat/completions"
 
 
-def _qianwen_base_urls() -> list[str]:
+@functools.lru_cache(maxsize=1)
+def _qianwen_base_urls() -> tuple[str, ...]:
     raw = os.environ.get("QIANWEN_BASE_URL", "").strip()
     if raw:
         parts = [x.strip().rstrip("/") for x in raw.split(",") if x.strip()]
         if not parts:
-            return ["https://dashscope.aliyuncs.com/compatible-mode/v1"]
+            return ("https://dashscope.aliyuncs.com/compatible-mode/v1",)
         # If China endpoint exists in configured list, force using China endpoints only.
         cn_parts = [p for p in parts if "dashscope.aliyuncs.com" in p]
         if cn_parts:
-            dedup: list[str] = []
-            for p in cn_parts:
-                if p not in dedup:
-                    dedup.append(p)
-            return dedup
-        return parts
+            return tuple(dict.fromkeys(cn_parts))
+        return tuple(parts)
     # Default to DashScope China endpoint.
-    return ["https://dashscope.aliyuncs.com/compatible-mode/v1"]
+    return ("https://dashscope.aliyuncs.com/compatible-mode/v1",)
 
 
 def _qianwen_base_url() -> str:
@@ -518,6 +691,7 @@ def _qianwen_chat_url(base: str | None = None) -> str:
     return f"{base}/v1/chat/completions"
 
 
+@functools.lru_cache(maxsize=1)
 def _deepseek_timeout_effective() -> tuple[float, float]:
     try:
         configured = float(os.environ.get("DEEPSEEK_TIMEOUT_S", "60") or "60")
@@ -537,6 +711,7 @@ def _deepseek_timeout_effective() -> tuple[float, float]:
     return configured, min(configured, cap)
 
 
+@functools.lru_cache(maxsize=1)
 def _deepseek_retries_effective() -> tuple[int, int]:
     configured = int(os.environ.get("DEEPSEEK_RETRIES", "2") or "2")
     if configured < 0:
@@ -562,6 +737,7 @@ def _deepseek_total_deadline_effective(timeout_s: float, retries: int) -> float:
     return min(max((timeout_s * (retries + 1)) + 10.0, 45.0), 300.0)
 
 
+@functools.lru_cache(maxsize=1)
 def _qianwen_timeout_effective() -> tuple[float, float]:
     try:
         configured = float(os.environ.get("QIANWEN_TIMEOUT_S", "60") or "60")
@@ -581,6 +757,7 @@ def _qianwen_timeout_effective() -> tuple[float, float]:
     return configured, min(configured, cap)
 
 
+@functools.lru_cache(maxsize=1)
 def _qianwen_retries_effective() -> tuple[int, int]:
     configured = int(os.environ.get("QIANWEN_RETRIES", "1") or "1")
     if configured < 0:
@@ -606,13 +783,17 @@ def _qianwen_total_deadline_effective(timeout_s: float, retries: int) -> float:
     return min(max((timeout_s * (retries + 1)) + 8.0, 60.0), 300.0)
 
 
+_FENCE_OPEN_RE = re.compile(r"^```(?:json)?\s*", re.IGNORECASE)
+_FENCE_CLOSE_RE = re.compile(r"\s*```$")
+
+
 def _extract_json_object_from_text(text: str) -> Any:
     s = (text or "").strip()
     if not s:
         raise RuntimeError("empty model content")
     if s.startswith("```"):
-        s = re.sub(r"^```(?:json)?\s*", "", s, flags=re.IGNORECASE)
-        s = re.sub(r"\s*```$", "", s)
+        s = _FENCE_OPEN_RE.sub("", s)
+        s = _FENCE_CLOSE_RE.sub("", s)
         s = s.strip()
     try:
         return _json_loads_loose(s)
@@ -626,14 +807,114 @@ def _extract_json_object_from_text(text: str) -> Any:
     raise RuntimeError("model content did not contain valid json object")
 
 
+@functools.lru_cache(maxsize=1)
 def _deepseek_api_key() -> str:
     return _env_first("DEEPSEEK_API_KEY", "DeepSeek_API_KEY", "DEEPSEEK_KEY")
 
 
+@functools.lru_cache(maxsize=1)
 def _qianwen_api_key() -> str:
     return _env_first("QIANWEN_API_KEY", "DASHSCOPE_API_KEY")
 
 
+_DEFAULT_SYSTEM_ROLE_TEXT = (
+    "Role: 你是一名拥有 10 年经验的资深软件测试架构师，擅长利用等价类划分、边界值分析、因果图及错误推测法编写高质量测试用例。"
+    "你必须只输出合法 JSON 对象，不要输出 Markdown 或额外解释。"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _llm_system_role_text() -> str:
+    return os.environ.get("AI_SYSTEM_PROMPT", "").strip() or _DEFAULT_SYSTEM_ROLE_TEXT
+
+
+@functools.lru_cache(maxsize=1)
+def _case_prompt_template() -> str:
+    return os.environ.get("AI_CASE_PROMPT_TEMPLATE", "").strip()
+
+
+# Env-derived provider settings are read once per process (Vercel and the
+# local server fix their environment at start). Call reset_config() after
+# changing os.environ at runtime.
+_CONFIG_CACHES = (
+    _gemini_model,
+    _deepseek_model,
+    _qianwen_model,
+    _deepseek_base_url,
+    _deepseek_chat_url,
+    _qianwen_base_urls,
+    _deepseek_timeout_effective,
+    _deepseek_retries_effective,
+    _qianwen_timeout_effective,
+    _qianwen_retries_effective,
+    _deepseek_api_key,
+    _qianwen_api_key,
+    _safe_int_env,
+    _llm_system_role_text,
+    _case_prompt_template,
+)
+
+
+def reset_config() -> None:
+    for fn in _CONFIG_CACHES:
+        fn.cache_clear()
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE.clear()
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
+
+
+def _retry_after_s(e: error.HTTPError) -> float | None:
+    # Retry-After is either delta-seconds or an HTTP-date.
+    raw = str((e.headers or {}).get("Retry-After") or "").strip()
+    if not raw:
+        return None
+    try:
+        wait = float(raw)
+    except ValueError:
+        try:
+            wait = parsedate_to_datetime(raw).timestamp() - time.time()
+        except (TypeError, ValueError, OverflowError):
+            return None
+    return min(max(wait, 0.0), 30.0)
+
+
+def _backoff_s(attempt: int, e: error.HTTPError | None = None) -> float:
+    """
+    Delay before retry `attempt + 1`: the server's Retry-After when it sent
+    one, otherwise full-jitter exponential backoff (uniform in [0, min(8, 0.5 * 2**attempt)]).
+    """
+    if e is not None:
+        hint = _retry_after_s(e)
+        if hint is not None:
+            return hint
+    return random.uniform(0.0, min(8.0, 0.5 * 2**attempt))
+
+
+def _sleep_before_retry(deadline: float, attempt: int, e: error.HTTPError | None = None) -> bool:
+    """
+    Sleep `_backoff_s` before another attempt, unless that would run past the
+    `time.monotonic()` deadline; returns False (without sleeping) in that case.
+    """
+    delay = _backoff_s(attempt, e)
+    if delay >= deadline - time.monotonic():
+        return False
+    time.sleep(delay)
+    return True
+
+
+def _ws_preview(data: Any, limit: int) -> str:
+    # Same as collapsing whitespace over the whole body and slicing, without
+    # scanning a large body: collapsing a prefix yields a prefix of the result.
+    s = str(data or "")
+    window = limit * 4
+    while True:
+        out = _WS_RUN_RE.sub(" ", s[:window])
+        if len(out) >= limit or window >= len(s):
+            return out[:limit]
+        window *= 4
+
+
 def _is_timeout_error(exc: Exception) -> bool:
     if isinstance(exc, (TimeoutError, socket.timeout)):
         return True
@@ -643,40 +924,29 @@ def _is_timeout_error(exc: Exception) -> bool:
     return "timed out" in str(exc).lower()
 
 
+_RETRYABLE_TRANSPORT_TYPES = (
+    IncompleteRead,
+    RemoteDisconnected,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+# str(URLError) embeds its reason, so this one scan also covers string reasons.
+_RETRYABLE_TRANSPORT_RE = re.compile(
+    r"incompleteread|remote end closed connection|connection reset|connection aborted"
+    r"|broken pipe|connection broken|chunkedencodingerror",
+    re.IGNORECASE,
+)
+
+
 def _is_retryable_transport_error(exc: Exception) -> bool:
-    retryable_types = (
-        IncompleteRead,
-        RemoteDisconnected,
-        ConnectionResetError,
-        ConnectionAbortedError,
-        BrokenPipeError,
-    )
-    if isinstance(exc, retryable_types):
+    if isinstance(exc, _RETRYABLE_TRANSPORT_TYPES):
         return True
     if isinstance(exc, error.URLError):
         reason = getattr(exc, "reason", None)
-        if isinstance(reason, retryable_types + (TimeoutError, socket.timeout)):
+        if isinstance(reason, _RETRYABLE_TRANSPORT_TYPES + (TimeoutError, socket.timeout)):
             return True
-        if isinstance(reason, str):
-            low_reason = reason.lower()
-            if any(
-                k in low_reason
-                for k in ("incompleteread", "connection reset", "connection aborted", "broken pipe")
-            ):
-                return True
-    low = str(exc).lower()
-    return any(
-        k in low
-        for k in (
-            "incompleteread",
-            "remote end closed connection",
-            "connection reset",
-            "connection aborted",
-            "broken pipe",
-            "connection broken",
-            "chunkedencodingerror",
-        )
-    )
+    return _RETRYABLE_TRANSPORT_RE.search(str(exc)) is not None
 
 
 def _try_decode_complete_json_text(raw: Any) -> str | None:
@@ -689,41 +959,53 @@ def _try_decode_complete_json_text(raw: Any) -> str | None:
     if not text:
         return None
     try:
-        json.loads(text)
+        _json.loads(text)
         return text
     except Exception:
         return None
 
 
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_CTRL_DEL_TABLE = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20)])
+
+
 def _json_loads_loose(text: str) -> Any:
     s = (text or "").strip()
     if not s:
         raise RuntimeError("empty json text")
 
-    candidates: list[str] = []
-    base = s.replace("\ufeff", "").strip()
-    candidates.append(base)
-    # Remove trailing commas before object/array endings.
-    candidates.append(re.sub(r",\s*([}\]])", r"\1", base))
-    # Remove accidental control chars that sometimes appear in streaming responses.
-    candidates.append(re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", base))
-
-    last_err: Exception | None = None
-    dedup: list[str] = []
+    base = s.replace("\ufeff", "").strip() if "\ufeff" in s else s
+    if not base:
+        raise RuntimeError("json parse failed")
+    # Well-formed JSON is the common case; only build cleanup variants on failure.
+    try:
+        return _json.loads(base)
+    except Exception as e:
+        last_err: Exception = e
+    try:
+        return json.loads(base, strict=False)
+    except Exception as e:
+        last_err = e
+
+    tried = {base}
+    candidates = (
+        # Remove trailing commas before object/array endings.
+        _TRAILING_COMMA_RE.sub(r"\1", base),
+        # Remove accidental control chars that sometimes appear in streaming responses.
+        base.translate(_CTRL_DEL_TABLE),
+    )
     for c in candidates:
-        if c and c not in dedup:
-            dedup.append(c)
-    for c in dedup:
+        if not c or c in tried:
+            continue
+        tried.add(c)
         try:
-            return json.loads(c)
+            return _json.loads(c)
         except Exception as e:
             last_err = e
         try:
             return json.loads(c, strict=False)
         except Exception as e:
             last_err = e
-    if last_err is None:
-        raise RuntimeError("json parse failed")
     raise last_err
 
 
@@ -755,9 +1037,28 @@ def _find_balanced_json_object(text: str, start: int) -> str | None:
     return None
 
 
+_RAW_DECODER = json.JSONDecoder()
+# {"cases" / {"suggestions", plain or with escaped quotes (JSON inside a string).
+_CASES_MARKERS = ("cases", "suggestions", "cases_esc", "suggestions_esc")
+_CASES_MARKER_RE = re.compile(
+    r'\{(?:(?P<cases>"cases")|(?P<suggestions>"suggestions")'
+    r'|(?P<cases_esc>\\"cases\\")|(?P<suggestions_esc>\\"suggestions\\"))'
+)
+
+
 def _extract_cases_obj_from_raw_response(data: str) -> Any | None:
     s = str(data or "")
 
+    def _accept(obj: Any) -> Any | None:
+        if isinstance(obj, dict):
+            if "cases" in obj or "suggestions" in obj or "test_cases" in obj:
+                return obj
+            if _looks_like_case_dict(obj):
+                return {"cases": [obj]}
+        if isinstance(obj, list) and obj and all(isinstance(x, dict) for x in obj):
+            return {"cases": obj}
+        return None
+
     def _try_parse_obj_text(obj_text: str) -> Any | None:
         if not obj_text:
             return None
@@ -771,32 +1072,49 @@ def _extract_cases_obj_from_raw_response(data: str) -> Any | None:
                 obj = _json_loads_loose(cand)
             except Exception:
                 continue
-            if isinstance(obj, dict):
-                if "cases" in obj or "suggestions" in obj or "test_cases" in obj:
-                    return obj
-                if _looks_like_case_dict(obj):
-                    return {"cases": [obj]}
-            if isinstance(obj, list) and obj and all(isinstance(x, dict) for x in obj):
-                return {"cases": obj}
+            parsed = _accept(obj)
+            if parsed is not None:
+                return parsed
         return None
 
-    # Fast path: common plain/escaped markers.
-    for marker in ('{"cases"', '{"suggestions"', '{\\"cases\\"', '{\\"suggestions\\"'):
-        idx = s.find(marker)
+    # _json_loads_loose drops BOMs anywhere in the text, raw_decode would not.
+    direct = "\ufeff" not in s
+
+    def _try_at(idx: int) -> Any | None:
+        # Valid JSON at idx: the C scanner finds its extent and parses it in
+        # one call. Otherwise cut the balanced span and try the loose variants.
+        if direct:
+            try:
+                obj, _ = _RAW_DECODER.raw_decode(s, idx)
+            except ValueError:
+                pass
+            else:
+                parsed = _accept(obj)
+                if parsed is not None:
+                    return parsed
+        return _try_parse_obj_text(_find_balanced_json_object(s, idx) or "")
+
+    # Fast path: common plain/escaped markers, located in a single scan and
+    # tried in marker order (first occurrence of each).
+    first: dict[str, int] = {}
+    for m in _CASES_MARKER_RE.finditer(s):
+        first.setdefault(m.lastgroup, m.start())
+        if len(first) == len(_CASES_MARKERS):
+            break
+    for marker in _CASES_MARKERS:
+        idx = first.get(marker, -1)
         if idx >= 0:
-            obj_text = _find_balanced_json_object(s, idx)
-            parsed = _try_parse_obj_text(obj_text or "")
+            parsed = _try_at(idx)
             if parsed is not None:
                 return parsed
 
     # Exhaustive path: scan every JSON object start.
-    for idx, ch in enumerate(s):
-        if ch != "{":
-            continue
-        obj_text = _find_balanced_json_object(s, idx)
-        parsed = _try_parse_obj_text(obj_text or "")
+    idx = s.find("{")
+    while idx >= 0:
+        parsed = _try_at(idx)
         if parsed is not None:
             return parsed
+        idx = s.find("{", idx + 1)
     return None
 
 
@@ -825,11 +1143,14 @@ def _read_json_string_loose(text: str, start_quote: int) -> tuple[str, int, bool
     return "".join(buf), i, False
 
 
+_HEX4_RE = re.compile(r"[0-9a-fA-F]{4}")
+
+
 def _decode_json_like_string(raw: str) -> str:
     if not raw:
         return ""
     try:
-        return json.loads(f'"{raw}"')
+        return _json.loads(f'"{raw}"')
     except Exception:
         pass
 
@@ -860,7 +1181,7 @@ def _decode_json_like_string(raw: str) -> str:
             continue
         if nxt == "u" and i + 5 < len(raw):
             hex_part = raw[i + 2 : i + 6]
-            if re.fullmatch(r"[0-9a-fA-F]{4}", hex_part):
+            if _HEX4_RE.fullmatch(hex_part):
                 out.append(chr(int(hex_part, 16)))
                 i += 6
                 continue
@@ -914,47 +1235,53 @@ def _extract_content_text_from_broken_openai_payload(data: str) -> str:
     return max(candidates, key=len)
 
 
-def _safe_int_env(name: str, default: int, min_v: int, max_v: int) -> int:
-    try:
-        value = int(os.environ.get(name, str(default)) or str(default))
-    except Exception:
-        value = default
-    if value < min_v:
-        return min_v
-    if value > max_v:
-        return max_v
-    return value
-
-
-def _llm_system_role_text() -> str:
-    custom = os.environ.get("AI_SYSTEM_PROMPT", "").strip()
-    if custom:
-        return custom
-    return (
-        "Role: 你是一名拥有 10 年经验的资深软件测试架构师，擅长利用等价类划分、边界值分析、因果图及错误推测法编写高质量测试用例。"
-        "你必须只输出合法 JSON 对象，不要输出 Markdown 或额外解释。"
-    )
+_CASE_SCHEMA_TEXT = (
+    "{\"cases\":[{"
+    "\"case_id\":\"string\","
+    "\"module\":\"string\","
+    "\"title\":\"string\","
+    "\"priority\":\"P0|P1|P2|P3\","
+    "\"type\":\"functional|boundary|negative|security|performance|compatibility|api\","
+    "\"preconditions\":[\"string\"],"
+    "\"steps\":[{\"step_no\":1,\"action\":\"string\",\"test_data\":\"string\",\"expected_result\":\"string\"}],"
+    "\"expected_result\":\"string\","
+    "\"tags\":[\"string\"],"
+    "\"description\":\"string\""
+    "}]}"
+)
+
+# Fixed parts of the default case-generation prompt; only the case counts and
+# the requirement text are formatted per request.
+_CASE_PROMPT_HEAD = (
+    "Task: 请根据我提供的【需求描述】，设计一套专业、严密且易于自动化的测试用例。\n"
+    "Design Guidelines & Distribution:\n"
+    "- 功能测试 (60%): 必须覆盖 Happy Path、Negative Testing、输入/数值边界值分析。\n"
+    "- 性能与可靠性 (10%): 关注响应耗时与高并发下数据一致性。\n"
+    "- 合规性与 UI (10%): 关注行业规范、文案准确性、多端兼容性。\n"
+    "- 异常容错 (10%): 覆盖网络波动、服务宕机、非法参数注入等健壮性场景。\n"
+    "- 安全性 (10%): 覆盖垂直/水平越权、SQL 注入、敏感数据脱敏。\n"
+    "- 输出数量允许时，必须覆盖以上五大维度；当数量受限时优先保证每个非功能维度至少 1 条。\n"
+    "- 当输出数量 >= 10 时，优先按 6/1/1/1/1（功能/性能与可靠性/合规UI/异常容错/安全）分配。\n"
+)
+_CASE_PROMPT_TAIL = (
+    "Output Requirements:\n"
+    "- 严谨性: 每个步骤必须提供具体可执行的测试数据建议（例如 11 位手机号、特殊字符字符串、越界数值）。\n"
+    "- 格式: 虽以前端表格展示，但你必须严格返回 JSON，字段与表格列一一对应："
+    "用例ID(case_id)、模块(module)、用例标题(title)、优先级(priority)、前置条件(preconditions)、执行步骤(steps)、预期结果(expected_result)。\n"
+    "- 执行步骤(steps) 为数组；每个步骤包含 step_no/action/test_data/expected_result。\n"
+    "- 默认使用简体中文（需求明确要求英文时除外）。\n"
+    "- JSON 必须可被标准 json.loads 直接解析，禁止尾逗号，字符串双引号必须转义。\n"
+    "Schema:\n" + _CASE_SCHEMA_TEXT + "\n"
+    "需求描述:\n"
+)
 
 
 def _case_schema_text() -> str:
-    return (
-        "{\"cases\":[{"
-        "\"case_id\":\"string\","
-        "\"module\":\"string\","
-        "\"title\":\"string\","
-        "\"priority\":\"P0|P1|P2|P3\","
-        "\"type\":\"functional|boundary|negative|security|performance|compatibility|api\","
-        "\"preconditions\":[\"string\"],"
-        "\"steps\":[{\"step_no\":1,\"action\":\"string\",\"test_data\":\"string\",\"expected_result\":\"string\"}],"
-        "\"expected_result\":\"string\","
-        "\"tags\":[\"string\"],"
-        "\"description\":\"string\""
-        "}]}"
-    )
+    return _CASE_SCHEMA_TEXT
 
 
 def _case_generation_prompt_text(prompt: str, target_cases: int, max_cases: int) -> str:
-    custom = os.environ.get("AI_CASE_PROMPT_TEMPLATE", "").strip()
+    custom = _case_prompt_template()
     if custom:
         try:
             return custom.format(
@@ -967,25 +1294,9 @@ def _case_generation_prompt_text(prompt: str, target_cases: int, max_cases: int)
             # Fallback to default template when placeholder format is invalid.
             pass
     return (
-        "Task: 请根据我提供的【需求描述】，设计一套专业、严密且易于自动化的测试用例。\n"
-        "Design Guidelines & Distribution:\n"
-        "- 功能测试 (60%): 必须覆盖 Happy Path、Negative Testing、输入/数值边界值分析。\n"
-        "- 性能与可靠性 (10%): 关注响应耗时与高并发下数据一致性。\n"
-        "- 合规性与 UI (10%): 关注行业规范、文案准确性、多端兼容性。\n"
-        "- 异常容错 (10%): 覆盖网络波动、服务宕机、非法参数注入等健壮性场景。\n"
-        "- 安全性 (10%): 覆盖垂直/水平越权、SQL 注入、敏感数据脱敏。\n"
-        "- 输出数量允许时，必须覆盖以上五大维度；当数量受限时优先保证每个非功能维度至少 1 条。\n"
-        "- 当输出数量 >= 10 时，优先按 6/1/1/1/1（功能/性能与可靠性/合规UI/异常容错/安全）分配。\n"
+        f"{_CASE_PROMPT_HEAD}"
         f"数量要求: 目标输出 {target_cases} 条，最多 {max_cases} 条；若需求未指定数量，按目标条数输出。\n"
-        "Output Requirements:\n"
-        "- 严谨性: 每个步骤必须提供具体可执行的测试数据建议（例如 11 位手机号、特殊字符字符串、越界数值）。\n"
-        "- 格式: 虽以前端表格展示，但你必须严格返回 JSON，字段与表格列一一对应："
-        "用例ID(case_id)、模块(module)、用例标题(title)、优先级(priority)、前置条件(preconditions)、执行步骤(steps)、预期结果(expected_result)。\n"
-        "- 执行步骤(steps) 为数组；每个步骤包含 step_no/action/test_data/expected_result。\n"
-        "- 默认使用简体中文（需求明确要求英文时除外）。\n"
-        "- JSON 必须可被标准 json.loads 直接解析，禁止尾逗号，字符串双引号必须转义。\n"
-        f"Schema:\n{_case_schema_text()}\n"
-        f"需求描述:\n{prompt}"
+        f"{_CASE_PROMPT_TAIL}{prompt}"
     )
 
 
@@ -995,13 +1306,17 @@ def _gemini_prompt_text(prompt: str) -> str:
     return _case_generation_prompt_text(prompt, target_cases=target_cases, max_cases=max_cases)
 
 
+_CASE_COUNT_RE = re.compile(r"(\d{1,2})\s*(?:条|个)\s*(?:测试)?用例")
+_CASE_COUNT_VERB_RE = re.compile(r"(?:输出|生成|给我|提供)\s*(\d{1,2})\s*(?:条|个)")
+
+
 def _requested_case_count(prompt: str, max_cases: int) -> int:
     default_target = _safe_int_env("AI_DEFAULT_CASES", 10, 1, 30)
     default_target = min(default_target, max_cases)
     text = str(prompt or "")
-    m = re.search(r"(\d{1,2})\s*(?:条|个)\s*(?:测试)?用例", text)
+    m = _CASE_COUNT_RE.search(text)
     if not m:
-        m = re.search(r"(?:输出|生成|给我|提供)\s*(\d{1,2})\s*(?:条|个)", text)
+        m = _CASE_COUNT_VERB_RE.search(text)
     if m:
         try:
             req = int(m.group(1))
@@ -1018,7 +1333,7 @@ def _ensure_target_case_count(
         return cases
 
     base = (str(prompt or "").splitlines()[0].strip() or "需求场景")
-    base = re.sub(r"\s+", " ", base)[:80]
+    base = _WS_RUN_RE.sub(" ", base)[:80]
     labels = [
         "正常流程",
         "错误输入",
@@ -1052,10 +1367,37 @@ def _ensure_target_case_count(
     return out
 
 
+# keyword -> coverage dimension for _case_dimension_tags, scanned in one pass
+# the same way as _LOCAL_KW_RE (no keyword is a prefix of another dimension's).
+_DIMENSION_KW: dict[str, str] = {
+    kw: dim
+    for dim, kws in (
+        (
+            "performance",
+            ("性能", "并发", "耗时", "响应时间", "一致性", "可靠", "稳定", "latency", "throughput", "load", "stress"),
+        ),
+        ("compliance_ui", ("ui", "界面", "文案", "兼容", "多端", "合规", "compliance", "compatibility")),
+        (
+            "resilience",
+            ("异常", "容错", "网络波动", "宕机", "降级", "恢复", "重试", "超时", "timeout", "故障", "非法参数"),
+        ),
+        (
+            "security",
+            ("安全", "越权", "sql", "注入", "xss", "csrf", "脱敏", "敏感数据", "鉴权", "权限", "vertical", "horizontal"),
+        ),
+    )
+    for kw in kws
+}
+_DIMENSION_KW_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(_DIMENSION_KW, key=len, reverse=True)) + "))"
+)
+_DIMENSION_BY_TYPE = {"performance": "performance", "compatibility": "compliance_ui", "security": "security"}
+
+
 def _case_dimension_tags(s: SuggestedCase) -> set[str]:
     pro = professional_case_from_suggested(s)
     low_type = str(pro.get("type") or "").strip().lower()
-    tags = [str(x).lower() for x in _clean_list_str(pro.get("tags"), default=[], max_items=20)]
+    tags = [str(x).lower() for x in _clean_list_str(pro.get("tags"), max_items=20)]
     steps = pro.get("steps") if isinstance(pro.get("steps"), list) else []
     step_texts: list[str] = []
     for row in steps[:20]:
@@ -1074,28 +1416,11 @@ def _case_dimension_tags(s: SuggestedCase) -> set[str]:
         ]
     ).lower()
 
-    out: set[str] = set()
-    if low_type in ("functional", "boundary", "negative", "api"):
+    out = {_DIMENSION_KW[m.group(1)] for m in _DIMENSION_KW_RE.finditer(pool)}
+    if low_type in _FUNCTIONAL_TYPES:
         out.add("functional")
-    if low_type == "performance" or any(
-        k in pool
-        for k in ("性能", "并发", "耗时", "响应时间", "一致性", "可靠", "稳定", "latency", "throughput", "load", "stress")
-    ):
-        out.add("performance")
-    if low_type == "compatibility" or any(
-        k in pool for k in ("ui", "界面", "文案", "兼容", "多端", "合规", "compliance", "compatibility")
-    ):
-        out.add("compliance_ui")
-    if any(
-        k in pool
-        for k in ("异常", "容错", "网络波动", "宕机", "降级", "恢复", "重试", "超时", "timeout", "故障", "非法参数")
-    ):
-        out.add("resilience")
-    if low_type == "security" or any(
-        k in pool
-        for k in ("安全", "越权", "sql", "注入", "xss", "csrf", "脱敏", "敏感数据", "鉴权", "权限", "vertical", "horizontal")
-    ):
-        out.add("security")
+    elif low_type in _DIMENSION_BY_TYPE:
+        out.add(_DIMENSION_BY_TYPE[low_type])
     if not out:
         out.add("functional")
     return out
@@ -1120,7 +1445,7 @@ def _ensure_dimension_coverage(
         return cases
 
     base = (str(prompt or "").splitlines()[0].strip() or "核心业务流程")
-    base = re.sub(r"\s+", " ", base)[:80]
+    base = _WS_RUN_RE.sub(" ", base)[:80]
     seeds_by_dim = {
         "functional": f"{base} - 正向流程、反向校验与边界值分析",
         "performance": f"{base} - 高并发下响应耗时与数据一致性",
@@ -1182,10 +1507,29 @@ def _deepseek_prompt_text(prompt: str, max_cases: int, target_cases: int) -> str
     return _case_generation_prompt_text(prompt, target_cases=target_cases, max_cases=max_cases)
 
 
-def _parse_deepseek_response_cases(data: str) -> list[SuggestedCase]:
+def _response_text(data: str | bytes) -> str:
+    return data.decode("utf-8", errors="replace") if isinstance(data, (bytes, bytearray)) else data
+
+
+def _load_response_json(data: str | bytes) -> Any:
+    # Well-formed bodies are parsed straight from the response bytes; only a
+    # failed parse pays for the str decode and the loose cleanup passes.
+    # BOMs (stripped anywhere by _json_loads_loose) keep the old path.
+    if isinstance(data, (bytes, bytearray)):
+        if b"\xef\xbb\xbf" in data:
+            return _json_loads_loose(data.decode("utf-8", errors="replace"))
+        try:
+            return _json.loads(data)
+        except Exception:
+            data = data.decode("utf-8", errors="replace")
+    return _json_loads_loose(data)
+
+
+def _parse_deepseek_response_cases(data: str | bytes) -> list[SuggestedCase]:
     try:
-        payload = _json_loads_loose(data)
+        payload = _load_response_json(data)
     except Exception as e:
+        data = _response_text(data)
         # Some responses may have broken outer completion JSON while still
         # containing a valid inner {"cases":[...]} object. Try to recover it.
         recovered = _extract_cases_obj_from_raw_response(data)
@@ -1219,7 +1563,7 @@ def _parse_deepseek_response_cases(data: str) -> list[SuggestedCase]:
         except Exception:
             raw_obj = _extract_cases_obj_from_raw_response(str(content or ""))
             if raw_obj is None:
-                raw_obj = _extract_cases_obj_from_raw_response(data)
+                raw_obj = _extract_cases_obj_from_raw_response(_response_text(data))
             if raw_obj is None:
                 raise
 
@@ -1229,10 +1573,11 @@ def _parse_deepseek_response_cases(data: str) -> list[SuggestedCase]:
     return normalized
 
 
-def _parse_openai_compatible_response_cases(data: str, provider: str) -> list[SuggestedCase]:
+def _parse_openai_compatible_response_cases(data: str | bytes, provider: str) -> list[SuggestedCase]:
     try:
-        payload = _json_loads_loose(data)
+        payload = _load_response_json(data)
     except Exception as e:
+        data = _response_text(data)
         recovered = _extract_cases_obj_from_raw_response(data)
         if recovered is not None:
             normalized = _normalize_cases_payload(recovered)
@@ -1259,18 +1604,19 @@ def _parse_openai_compatible_response_cases(data: str, provider: str) -> list[Su
     if isinstance(content, dict):
         raw_obj = content
     elif isinstance(content, list):
-        text = ""
+        chunks: list[str] = []
         for part in content:
             if isinstance(part, dict) and isinstance(part.get("text"), str):
-                text += part["text"]
+                chunks.append(part["text"])
             elif isinstance(part, str):
-                text += part
+                chunks.append(part)
+        text = "".join(chunks)
         try:
             raw_obj = _extract_json_object_from_text(text)
         except Exception:
             raw_obj = _extract_cases_obj_from_raw_response(text)
             if raw_obj is None:
-                raw_obj = _extract_cases_obj_from_raw_response(data)
+                raw_obj = _extract_cases_obj_from_raw_response(_response_text(data))
             if raw_obj is None:
                 raise
     else:
@@ -1279,7 +1625,7 @@ def _parse_openai_compatible_response_cases(data: str, provider: str) -> list[Su
         except Exception:
             raw_obj = _extract_cases_obj_from_raw_response(str(content or ""))
             if raw_obj is None:
-                raw_obj = _extract_cases_obj_from_raw_response(data)
+                raw_obj = _extract_cases_obj_from_raw_response(_response_text(data))
             if raw_obj is None:
                 raise
 
@@ -1289,41 +1635,48 @@ def _parse_openai_compatible_response_cases(data: str, provider: str) -> list[Su
     return normalized
 
 
+@functools.lru_cache(maxsize=4)
+def _gemini_body_head(system_text: str) -> bytes:
+    return b'{"systemInstruction": {"parts": [{"text": ' + _json.dumps_utf8(system_text) + b"}]}, "
+
+
+_GEMINI_BODY_TAIL = b'}]}], "generationConfig": {"responseMimeType": "application/json"}}'
+
+
+def _gemini_request_body(system_text: str, user_prompt: str) -> bytes:
+    # Same JSON document as dumping the nested request dict, but only the
+    # prompt is encoded per call; the fixed structure and the (env-configured)
+    # system text are not re-encoded every request. Strings go out as raw
+    # UTF-8 (see _json.dumps_utf8).
+    return b"".join(
+        (
+            _gemini_body_head(system_text),
+            b'"contents": [{"role": "user", "parts": [{"text": ',
+            _json.dumps_utf8(user_prompt),
+            _GEMINI_BODY_TAIL,
+        )
+    )
+
+
 def _gemini_generate_raw(
     api_key: str,
     model: str,
     prompt: str,
     timeout_s: float,
     api_version: str = "v1beta",
-) -> str:
+) -> bytes:
     url = f"https://generativelanguage.googleapis.com/{api_version}/models/{model}:generateContent?key={api_key}"
-    user_prompt = _gemini_prompt_text(prompt)
-    req_body = {
-        "systemInstruction": {
-            "parts": [
-                {"text": _llm_system_role_text()}
-            ]
-        },
-        "contents": [{"role": "user", "parts": [{"text": user_prompt}]}],
-        "generationConfig": {"responseMimeType": "application/json"},
-    }
-    raw = json.dumps(req_body, ensure_ascii=True).encode("utf-8")
-    req = request.Request(
-        url,
-        data=raw,
-        method="POST",
-        headers={"Content-Type": "application/json"},
-    )
-
-    with request.urlopen(req, timeout=timeout_s) as resp:  # nosec - fixed upstream endpoint
-        return resp.read().decode("utf-8", errors="replace")
+    raw = _gemini_request_body(_llm_system_role_text(), prompt)
+    # Keep-alive: repeated calls reuse the TLS session to the fixed upstream endpoint.
+    # Raw bytes: the JSON parsers decode UTF-8 inline, no separate str copy.
+    return _http.request("POST", url, body=raw, headers={"Content-Type": "application/json"}, timeout=timeout_s)
 
 
 def _parse_http_error(e: error.HTTPError) -> tuple[int, str]:
     detail = e.read().decode("utf-8", errors="replace") if hasattr(e, "read") else str(e)
     message = ""
     try:
-        payload = json.loads(detail)
+        payload = _json.loads(detail)
         if isinstance(payload, dict):
             err = payload.get("error")
             if isinstance(err, dict):
@@ -1335,6 +1688,7 @@ def _parse_http_error(e: error.HTTPError) -> tuple[int, str]:
     return int(e.code), message[:500]
 
 
+@functools.lru_cache(maxsize=64)
 def _model_family(model: str) -> str:
     if not model:
         return ""
@@ -1345,7 +1699,8 @@ def _model_family(model: str) -> str:
     return m
 
 
-def _candidate_model_aliases(requested: str) -> list[str]:
+@functools.lru_cache(maxsize=64)
+def _candidate_model_aliases(requested: str) -> tuple[str, ...]:
     req = requested.removeprefix("models/")
     out: list[str] = [req]
     if req.endswith("-latest"):
@@ -1354,20 +1709,31 @@ def _candidate_model_aliases(requested: str) -> list[str]:
         out.append(f"{req}-latest")
     if not req.endswith("-001"):
         out.append(f"{req}-001")
-    # dedupe while preserving order
-    dedup: list[str] = []
-    for m in out:
-        if m and m not in dedup:
-            dedup.append(m)
-    return dedup
+    # dedupe while preserving order; a tuple, since the result is cached
+    return tuple(dict.fromkeys(m for m in out if m))
+
+
+# The model list changes on release timescales; (api_key, api_version) ->
+# (fetched_at monotonic, models). Only non-empty lists are kept.
+_LIST_MODELS_TTL_S = 300.0
+_LIST_MODELS_CACHE: dict[tuple[str, str], tuple[float, tuple[str, ...]]] = {}
 
 
 def _list_generate_models(api_key: str, timeout_s: float, api_version: str = "v1beta") -> list[str]:
+    key = (api_key, api_version)
+    hit = _LIST_MODELS_CACHE.get(key)
+    if hit is not None and time.monotonic() - hit[0] < _LIST_MODELS_TTL_S:
+        return list(hit[1])
+    out = _fetch_generate_models(api_key, timeout_s, api_version)
+    if out:
+        _LIST_MODELS_CACHE[key] = (time.monotonic(), tuple(out))
+    return out
+
+
+def _fetch_generate_models(api_key: str, timeout_s: float, api_version: str) -> list[str]:
     url = f"https://generativelanguage.googleapis.com/{api_version}/models?key={api_key}"
-    req = request.Request(url, method="GET")
-    with request.urlopen(req, timeout=timeout_s) as resp:  # nosec - fixed upstream endpoint
-        raw = resp.read().decode("utf-8", errors="replace")
-    payload = json.loads(raw)
+    raw = _http.request("GET", url, timeout=timeout_s).decode("utf-8", errors="replace")
+    payload = _json.loads(raw)
     models = payload.get("models") if isinstance(payload, dict) else []
     if not isinstance(models, list):
         return []
@@ -1425,22 +1791,44 @@ def _pick_fallback_model(requested: str, available: list[str]) -> str | None:
     return available[0]
 
 
-def _extract_content_text(data: str) -> str:
-    payload = json.loads(data)
-    parts = (
-        ((payload.get("candidates") or [{}])[0].get("content") or {}).get("parts")
-        if isinstance(payload, dict)
-        else None
-    )
-    text = ""
-    if isinstance(parts, list):
-        for part in parts:
-            if isinstance(part, dict) and isinstance(part.get("text"), str):
-                text += part["text"]
-    return text
+_DIG = object()
 
 
-def _gemini_generate_cases(prompt: str) -> list[SuggestedCase]:
+def _path(d: Any, *keys: str, default: Any = None) -> Any:
+    """Safe nested dict lookup: `default` as soon as a level is missing or not a dict."""
+    for k in keys:
+        if not isinstance(d, dict):
+            return default
+        d = d.get(k, _DIG)
+        if d is _DIG:
+            return default
+    return d
+
+
+def _extract_content_text(data: str | bytes) -> str:
+    try:
+        payload = _json.loads(data)
+    except UnicodeDecodeError:
+        # Invalid UTF-8 in the body: parse it the lenient way, as text.
+        payload = _json.loads(data.decode("utf-8", errors="replace"))
+    candidates = _path(payload, "candidates")
+    if not isinstance(candidates, list) or not candidates:
+        return ""
+    parts = _path(candidates[0], "content", "parts")
+    if not isinstance(parts, list):
+        return ""
+    if len(parts) == 1:
+        # The usual JSON-mode reply: one part, returned without a join copy.
+        text = _path(parts[0], "text")
+        return text if isinstance(text, str) else ""
+    return "".join(p["text"] for p in parts if isinstance(p, dict) and isinstance(p.get("text"), str))
+
+
+def _gemini_content_text(prompt: str) -> str:
+    """
+    Call Gemini (with model/version recovery) and return the response content text.
+    `prompt` is the complete user turn, e.g. from _gemini_prompt_text.
+    """
     api_key = os.environ.get("GEMINI_API_KEY", "").strip()
     if not api_key:
         raise RuntimeError("missing GEMINI_API_KEY")
@@ -1454,7 +1842,7 @@ def _gemini_generate_cases(prompt: str) -> list[SuggestedCase]:
     api_version = _GEMINI_API_VERSION_CACHE.get(requested_model, "v1beta")
     timeout_s = float(os.environ.get("GEMINI_TIMEOUT_S", "25"))
 
-    data = ""
+    data = b""
     try:
         data = _gemini_generate_raw(
             api_key=api_key,
@@ -1562,9 +1950,130 @@ def _gemini_generate_cases(prompt: str) -> list[SuggestedCase]:
 
     if not text.strip():
         raise RuntimeError("gemini response missing content text")
+    return text
+
+
+# Opt-in (AI_CACHE_SIZE > 0): successful provider results keyed by
+# blake2b(provider|model|prompt) -> (stored_at monotonic, rows), LRU-ordered.
+# Off by default so "regenerate" still asks the model for a fresh answer.
+# Rows are stored serialised and rebuilt per hit, so callers never share
+# (or mutate) the cached tags/spec objects.
+_CachedRow = tuple[str, str, tuple[str, ...], str, str]
+_RESPONSE_CACHE: OrderedDict[bytes, tuple[float, tuple[_CachedRow, ...]]] = OrderedDict()
+_RESPONSE_CACHE_LOCK = threading.Lock()
+
+
+def _response_cache_key(provider: str, model: str, prompt: str) -> bytes:
+    raw = f"{provider}|{model}|{prompt}".encode("utf-8", errors="surrogatepass")
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+def _response_cache_get(key: bytes) -> list[SuggestedCase] | None:
+    ttl = _safe_int_env("AI_CACHE_TTL_S", 600, 1, 86400)
+    with _RESPONSE_CACHE_LOCK:
+        hit = _RESPONSE_CACHE.get(key)
+        if hit is None or time.monotonic() - hit[0] >= ttl:
+            return None
+        _RESPONSE_CACHE.move_to_end(key)
+        stored = hit[1]
+    return [
+        SuggestedCase(title=t, description=d, tags=list(tags), kind=k, spec=_json.loads(spec_json))
+        for t, d, tags, k, spec_json in stored
+    ]
+
+
+def _response_cache_put(key: bytes, rows: list[SuggestedCase], size: int) -> None:
+    entry = tuple((s.title, s.description, tuple(s.tags), s.kind, _json.dumps_text(s.spec)) for s in rows)
+    with _RESPONSE_CACHE_LOCK:
+        _RESPONSE_CACHE[key] = (time.monotonic(), entry)
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > size:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
+def _response_cached(
+    provider: str, model: Callable[[], str]
+) -> Callable[[Callable[[str], list[SuggestedCase]]], Callable[[str], list[SuggestedCase]]]:
+    def wrap(fn: Callable[[str], list[SuggestedCase]]) -> Callable[[str], list[SuggestedCase]]:
+        @functools.wraps(fn)
+        def cached(prompt: str) -> list[SuggestedCase]:
+            size = _safe_int_env("AI_CACHE_SIZE", 0, 0, 4096)
+            if not size:
+                return fn(prompt)
+            key = _response_cache_key(provider, model(), prompt)
+            stored = _response_cache_get(key)
+            if stored is not None:
+                return stored
+            rows = fn(prompt)
+            if rows:
+                _response_cache_put(key, rows, size)
+            return rows
+
+        return cached
+
+    return wrap
+
 
+# Per-provider circuit breaker: after AI_BREAKER_FAILS consecutive failures
+# the provider is skipped for AI_BREAKER_COOLDOWN_S, then a single caller
+# probes it (half-open) while the rest keep failing fast. 0 fails disables it.
+_BREAKERS: dict[str, dict[str, Any]] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def _breaker_settings() -> tuple[int, int]:
+    return _safe_int_env("AI_BREAKER_FAILS", 5, 0, 100), _safe_int_env("AI_BREAKER_COOLDOWN_S", 30, 1, 3600)
+
+
+_In = TypeVar("_In")
+_Out = TypeVar("_Out")
+
+
+def _breaker_guarded(provider: str) -> Callable[[Callable[[_In], _Out]], Callable[[_In], _Out]]:
+    # Shared by the single-prompt generators and the Gemini batch call, so both
+    # count toward (and are skipped by) the same per-provider breaker.
+    def wrap(fn: Callable[[_In], _Out]) -> Callable[[_In], _Out]:
+        @functools.wraps(fn)
+        def guarded(prompt: _In) -> _Out:
+            threshold, cooldown = _breaker_settings()
+            if not threshold:
+                return fn(prompt)
+            with _BREAKERS_LOCK:
+                st = _BREAKERS.setdefault(provider, {"fails": 0, "opened_at": 0.0, "probing": False})
+                if st["fails"] >= threshold:
+                    left = cooldown - (time.monotonic() - st["opened_at"])
+                    if left > 0 or st["probing"]:
+                        raise RuntimeError(
+                            f"{provider} skipped: circuit open after {st['fails']} consecutive failures"
+                            f" (retry in {max(left, 0.0):.0f}s)"
+                        )
+                    st["probing"] = True
+            ok = False
+            try:
+                rows = fn(prompt)
+                ok = True
+                return rows
+            finally:
+                with _BREAKERS_LOCK:
+                    st["probing"] = False
+                    if ok:
+                        st["fails"] = 0
+                    else:
+                        st["fails"] += 1
+                        if st["fails"] >= threshold:
+                            st["opened_at"] = time.monotonic()
+
+        return guarded
+
+    return wrap
+
+
+@_response_cached("gemini", _gemini_model)
+@_breaker_guarded("gemini")
+def _gemini_generate_cases(prompt: str) -> list[SuggestedCase]:
+    text = _gemini_content_text(_gemini_prompt_text(prompt))
     try:
-        normalized = _normalize_cases_payload(json.loads(text))
+        normalized = _normalize_cases_payload(_json.loads(text))
     except json.JSONDecodeError as e:
         raise RuntimeError("gemini text payload was not valid json") from e
 
@@ -1573,6 +2082,55 @@ def _gemini_generate_cases(prompt: str) -> list[SuggestedCase]:
     return normalized
 
 
+# Requirements per Gemini batch request; more are split into several requests.
+# Every requirement in a request shares one output-token budget, so keep it
+# small enough that a reply is not truncated.
+def _gemini_batch_size() -> int:
+    return _safe_int_env("GEMINI_BATCH_MAX_PROMPTS", 5, 1, 20)
+
+
+def _gemini_batch_prompt_text(prompts: tuple[str, ...]) -> str:
+    blocks = [f"---REQ {i}---\n{_gemini_prompt_text(p)}" for i, p in enumerate(prompts)]
+    return (
+        f"以下包含 {len(prompts)} 个相互独立的需求，以 ---REQ <序号>--- 分隔（序号从 0 开始）。\n"
+        "请对每个需求分别按其中的要求设计测试用例，并只返回一个 JSON 对象："
+        '{"batches":[{"req":0,"cases":[...]}]}，'
+        "其中 req 为需求序号，cases 沿用该需求 Schema 中 cases 的结构。\n\n" + "\n\n".join(blocks)
+    )
+
+
+@_breaker_guarded("gemini")
+def _gemini_generate_cases_batch(prompts: tuple[str, ...]) -> list[list[SuggestedCase]]:
+    """
+    One Gemini round-trip for several requirements.
+    An empty list at an index means that requirement got no usable cases.
+    """
+    text = _gemini_content_text(_gemini_batch_prompt_text(prompts))
+    try:
+        payload = _json.loads(text)
+    except json.JSONDecodeError as e:
+        raise RuntimeError("gemini batch payload was not valid json") from e
+    batches = payload.get("batches") if isinstance(payload, dict) else None
+    if not isinstance(batches, list):
+        raise RuntimeError("gemini batch payload missing batches")
+
+    out: list[list[SuggestedCase]] = [[] for _ in prompts]
+    for entry in batches:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            idx = int(entry.get("req"))
+        except (TypeError, ValueError):
+            continue
+        if 0 <= idx < len(prompts) and not out[idx]:
+            out[idx] = _normalize_cases_payload(entry)
+    if not any(out):
+        raise RuntimeError("gemini batch returned empty/invalid cases")
+    return out
+
+
+@_response_cached("deepseek", _deepseek_model)
+@_breaker_guarded("deepseek")
 def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
     api_key = _deepseek_api_key()
     if not api_key:
@@ -1600,9 +2158,18 @@ def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
     max_attempts = retries + 1
     url = _deepseek_chat_url()
 
+    # No "Connection: close": the pooled connection is kept alive across
+    # retries and later generations.
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+        "Accept-Encoding": "identity",
+    }
+
     parse_attempts = parse_retries + 1
     last_parse_error: Exception | None = None
     t0 = time.monotonic()
+    deadline = t0 + total_deadline_s
     for parse_attempt in range(1, parse_attempts + 1):
         # If prior parse failed, reduce output size to lower truncation risk.
         scale = 0.7 ** (parse_attempt - 1)
@@ -1629,20 +2196,9 @@ def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
         }
         if force_json_object:
             req_body["response_format"] = {"type": "json_object"}
-        raw = json.dumps(req_body, ensure_ascii=True).encode("utf-8")
-        req = request.Request(
-            url,
-            data=raw,
-            method="POST",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-                "Accept-Encoding": "identity",
-                "Connection": "close",
-            },
-        )
+        raw = _json.dumps_utf8(req_body)
 
-        data = ""
+        data: str | bytes = ""
         for attempt in range(1, max_attempts + 1):
             try:
                 elapsed = time.monotonic() - t0
@@ -1652,9 +2208,9 @@ def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
                         f"deepseek deadline exceeded ({total_deadline_s}s)"
                     )
                 attempt_timeout = min(timeout_s, max(3.0, remaining))
-                with request.urlopen(req, timeout=attempt_timeout) as resp:  # nosec - fixed upstream endpoint
-                    data = resp.read().decode("utf-8", errors="replace")
-                    break
+                # Kept as bytes: the parser decodes only if the fast path fails.
+                data = _http.request("POST", url, body=raw, headers=headers, timeout=attempt_timeout)
+                break
             except IncompleteRead as e:
                 # Some upstream connections close early after sending most bytes.
                 # If the partial body is still valid JSON, accept it; otherwise retry.
@@ -1662,8 +2218,7 @@ def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
                 if partial_text:
                     data = partial_text
                     break
-                if attempt < max_attempts:
-                    time.sleep(min(2 ** (attempt - 1), 4))
+                if attempt < max_attempts and _sleep_before_retry(deadline, attempt):
                     continue
                 partial_size = len(getattr(e, "partial", b"") or b"")
                 raise RuntimeError(
@@ -1673,25 +2228,26 @@ def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
                 code, msg = _parse_http_error(e)
                 if code == 402:
                     raise RuntimeError("deepseek insufficient balance (402): top up DeepSeek account") from e
+                # Retry on rate limiting and transient 5xx errors.
+                if (
+                    (code == 429 or code in _RETRY_HTTP_CODES)
+                    and attempt < max_attempts
+                    and _sleep_before_retry(deadline, attempt, e)
+                ):
+                    continue
                 if code == 429:
                     raise RuntimeError(
                         "deepseek quota/rate limit exceeded (429): check plan/billing or wait for reset"
                     ) from e
-                # Retry on transient 5xx errors.
-                if code in (500, 502, 503, 504) and attempt < max_attempts:
-                    time.sleep(min(2 ** (attempt - 1), 4))
-                    continue
                 raise RuntimeError(f"deepseek http error: {code} {msg}") from e
             except Exception as e:  # pragma: no cover - environment/network dependent
-                if _is_timeout_error(e) and attempt < max_attempts:
-                    time.sleep(min(2 ** (attempt - 1), 4))
+                if _is_timeout_error(e) and attempt < max_attempts and _sleep_before_retry(deadline, attempt):
                     continue
                 if _is_timeout_error(e):
                     raise RuntimeError(
                         f"deepseek request timed out after {max_attempts} attempts (timeout={timeout_s}s)"
                     ) from e
-                if _is_retryable_transport_error(e) and attempt < max_attempts:
-                    time.sleep(min(2 ** (attempt - 1), 4))
+                if _is_retryable_transport_error(e) and attempt < max_attempts and _sleep_before_retry(deadline, attempt):
                     continue
                 if _is_retryable_transport_error(e):
                     raise RuntimeError(
@@ -1709,7 +2265,7 @@ def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
             if parse_attempt < parse_attempts:
                 time.sleep(min(2 ** (parse_attempt - 1), 3))
                 continue
-            data_preview = re.sub(r"\s+", " ", str(data or ""))[:180]
+            data_preview = _ws_preview(_response_text(data), 180)
             raise RuntimeError(
                 f"deepseek invalid json content after {parse_attempts} attempts: {parse_err}; preview={data_preview}"
             ) from parse_err
@@ -1717,6 +2273,8 @@ def _deepseek_generate_cases(prompt: str) -> list[SuggestedCase]:
     raise RuntimeError(f"deepseek parse retries exhausted: {last_parse_error}")
 
 
+@_response_cached("qianwen", _qianwen_model)
+@_breaker_guarded("qianwen")
 def _qianwen_generate_cases(prompt: str) -> list[SuggestedCase]:
     api_key = _qianwen_api_key()
     if not api_key:
@@ -1740,34 +2298,31 @@ def _qianwen_generate_cases(prompt: str) -> list[SuggestedCase]:
     errors: list[str] = []
     auth_failures: list[str] = []
     t0 = time.monotonic()
-    for url in urls:
-        req_body = {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": _llm_system_role_text()},
-                {
-                    "role": "user",
-                    "content": _deepseek_prompt_text(text, max_cases=max_cases, target_cases=target_cases),
-                },
-            ],
-            "temperature": 0.1,
-            "stream": False,
-            "max_tokens": max_tokens,
-        }
-        raw = json.dumps(req_body, ensure_ascii=True).encode("utf-8")
-        req = request.Request(
-            url,
-            data=raw,
-            method="POST",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-                "Accept-Encoding": "identity",
-                "Connection": "close",
+    deadline = t0 + total_deadline_s
+    # The request is the same for every endpoint; encode it once.
+    req_body = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": _llm_system_role_text()},
+            {
+                "role": "user",
+                "content": _deepseek_prompt_text(text, max_cases=max_cases, target_cases=target_cases),
             },
-        )
-
-        data = ""
+        ],
+        "temperature": 0.1,
+        "stream": False,
+        "max_tokens": max_tokens,
+    }
+    raw = _json.dumps_utf8(req_body)
+    # No "Connection: close": the pooled connection is kept alive across
+    # retries and later generations.
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}",
+        "Accept-Encoding": "identity",
+    }
+    for url in urls:
+        data: str | bytes = ""
         endpoint_ok = False
         for attempt in range(1, max_attempts + 1):
             try:
@@ -1777,10 +2332,10 @@ def _qianwen_generate_cases(prompt: str) -> list[SuggestedCase]:
                     errors.append(f"{url} deadline exceeded ({total_deadline_s}s)")
                     break
                 attempt_timeout = min(timeout_s, max(3.0, remaining))
-                with request.urlopen(req, timeout=attempt_timeout) as resp:  # nosec - fixed upstream endpoint
-                    data = resp.read().decode("utf-8", errors="replace")
-                    endpoint_ok = True
-                    break
+                # Kept as bytes: the parser decodes only if the fast path fails.
+                data = _http.request("POST", url, body=raw, headers=headers, timeout=attempt_timeout)
+                endpoint_ok = True
+                break
             except error.HTTPError as e:
                 code, msg = _parse_http_error(e)
                 if code in (401, 403):
@@ -1792,22 +2347,19 @@ def _qianwen_generate_cases(prompt: str) -> list[SuggestedCase]:
                     raise RuntimeError(
                         "qianwen quota/rate limit exceeded (429): check plan/billing or wait for reset"
                     ) from e
-                if code in (500, 502, 503, 504) and attempt < max_attempts:
-                    time.sleep(min(2 ** (attempt - 1), 4))
+                if code in _RETRY_HTTP_CODES and attempt < max_attempts and _sleep_before_retry(deadline, attempt, e):
                     continue
                 errors.append(f"{url} http {code}: {msg}")
                 break
             except Exception as e:  # pragma: no cover - environment/network dependent
-                if _is_timeout_error(e) and attempt < max_attempts:
-                    time.sleep(min(2 ** (attempt - 1), 4))
+                if _is_timeout_error(e) and attempt < max_attempts and _sleep_before_retry(deadline, attempt):
                     continue
                 if _is_timeout_error(e):
                     errors.append(
                         f"{url} timeout after {max_attempts} attempts (timeout={timeout_s}s, deadline={total_deadline_s}s)"
                     )
                     break
-                if _is_retryable_transport_error(e) and attempt < max_attempts:
-                    time.sleep(min(2 ** (attempt - 1), 4))
+                if _is_retryable_transport_error(e) and attempt < max_attempts and _sleep_before_retry(deadline, attempt):
                     continue
                 if _is_retryable_transport_error(e):
                     errors.append(
@@ -1825,7 +2377,7 @@ def _qianwen_generate_cases(prompt: str) -> list[SuggestedCase]:
             rows = _ensure_dimension_coverage(rows, text, target_cases=target_cases, max_cases=max_cases)
             return rows
         except Exception as e:
-            preview = re.sub(r"\s+", " ", str(data or ""))[:120]
+            preview = _ws_preview(_response_text(data), 120)
             errors.append(f"{url} parse failed: {e}; preview={preview}")
             continue
 
@@ -1839,64 +2391,54 @@ def _qianwen_generate_cases(prompt: str) -> list[SuggestedCase]:
     raise RuntimeError("qianwen request failed")
 
 
-def _infer_local_profile(line: str) -> tuple[str, str, str, list[str], str]:
-    low = line.lower()
+# Requirement docs repeat bullets; tags come back as a tuple so cached results
+# stay immutable (callers copy them into a list per case).
+@functools.lru_cache(maxsize=1024)
+def _infer_local_profile(line: str) -> tuple[str, str, str, tuple[str, ...], str]:
+    low = line if line.isascii() and line.islower() else line.lower()
     module = "通用模块"
     case_type = "functional"
     priority = "P1"
-    tags: list[str] = []
+    tags: set[str] = set()
     expected = "系统行为符合预期业务结果。"
 
-    if any(k in low for k in ["login", "sign in", "auth"]) or any(k in line for k in ["登录", "鉴权", "认证"]):
-        module = "登录认证"
-        tags.append("auth")
-    if any(k in low for k in ["payment", "checkout", "refund"]) or any(k in line for k in ["支付", "结算", "退款"]):
-        module = "支付结算"
-        tags.append("payment")
-    if "api" in low or "接口" in line:
-        module = "接口"
-        tags.append("api")
+    hits = _local_families(low)
+    if not hits:
+        return module, case_type, priority, (), expected
+
+    for tag, family_module, _ in _LOCAL_DOMAIN_FAMILIES:
+        if tag in hits:
+            module = family_module
+            tags.add(tag)
+    if "api" in hits:
         case_type = "api"
 
-    if any(k in low for k in ["error", "fail", "invalid", "forbidden", "denied"]) or any(
-        k in line for k in ["失败", "错误", "异常", "非法", "拒绝"]
-    ):
-        case_type = "negative"
-        expected = "系统拒绝非法输入并返回明确错误信息。"
-
-    if any(k in low for k in ["boundary", "limit", "max", "min", "empty", "null"]) or any(
-        k in line for k in ["边界", "上限", "下限", "为空", "空值", "长度"]
-    ):
-        case_type = "boundary"
-        expected = "系统可正确处理边界输入，且不破坏约束。"
-
-    if any(k in low for k in ["ui", "compatibility", "compliance", "copywriting"]) or any(
-        k in line for k in ["界面", "兼容", "合规", "文案", "多端"]
-    ):
-        case_type = "compatibility"
-        expected = "界面展示、文案与多端兼容性符合规范要求。"
-
-    if any(k in low for k in ["resilience", "fault", "chaos", "timeout", "retry", "degrade"]) or any(
-        k in line for k in ["容错", "网络波动", "宕机", "降级", "超时", "重试", "故障恢复"]
-    ):
-        case_type = "negative"
-        expected = "系统在异常条件下具备可观测、可恢复的容错能力。"
-
-    if any(k in low for k in ["security", "permission", "csrf", "xss", "sql injection"]) or any(
-        k in line for k in ["安全", "权限", "注入", "越权", "风控"]
-    ):
-        case_type = "security"
-        priority = "P0"
-        expected = "安全控制有效拦截风险行为，并产生可审计结果。"
-
-    if any(k in low for k in ["performance", "load", "stress", "latency"]) or any(
-        k in line for k in ["性能", "并发", "压测", "延迟"]
-    ):
-        case_type = "performance"
-        priority = "P1"
-        expected = "响应时间与吞吐量满足既定性能目标。"
-
-    return module, case_type, priority, sorted(set(tags)), expected
+    for family, family_type, family_priority, family_expected, _ in _LOCAL_CASE_FAMILIES:
+        if family in hits:
+            case_type = family_type
+            expected = family_expected
+            if family_priority:
+                priority = family_priority
+
+    return module, case_type, priority, tuple(sorted(tags)), expected
+
+
+# Fixed parts of every local row (copied per case, callers may edit specs).
+_LOCAL_STEP_PREPARE = {
+    "step_no": 1,
+    "action": "准备前置条件和输入数据",
+    "test_data": "按场景要求准备",
+    "expected_result": "前置条件满足",
+}
+_LOCAL_STEP_VERIFY = {
+    "step_no": 3,
+    "action": "校验响应和副作用",
+    "test_data": "无",
+}
+_LOCAL_PRECONDITIONS = (
+    "系统可访问",
+    "测试账号和测试数据已准备好",
+)
 
 
 def generate_cases_local(prompt: str) -> list[SuggestedCase]:
@@ -1907,60 +2449,46 @@ def generate_cases_local(prompt: str) -> list[SuggestedCase]:
     if not text:
         return []
 
-    lines = [ln.strip(" \t-•*") for ln in text.splitlines()]
-    lines = [ln for ln in lines if ln]
+    # Bullets are only stripped at the line edges ("log-in" keeps its dash);
+    # one lazy pass that stops after the 50th non-empty line.
+    lines = islice(filter(None, (ln.strip(" \t-•*") for ln in text.splitlines())), 50)
 
+    # Every field except the line itself comes from fixed tables that are
+    # already in normalised form, so the case is built directly in the shape
+    # _normalize_case would produce instead of round-tripping a raw row.
     out: list[SuggestedCase] = []
-    for ln in lines[:50]:
-        module, case_type, priority, tags, expected = _infer_local_profile(ln)
-        steps = [
-            {
-                "step_no": 1,
-                "action": "准备前置条件和输入数据",
-                "test_data": "按场景要求准备",
-                "expected_result": "前置条件满足",
-            },
-            {
-                "step_no": 2,
-                "action": ln,
-                "test_data": "场景对应输入",
-                "expected_result": "系统接收并处理请求",
-            },
-            {
-                "step_no": 3,
-                "action": "校验响应和副作用",
-                "test_data": "无",
-                "expected_result": expected,
-            },
-        ]
-        row = {
-            "title": ln,
-            "description": "根据需求文本生成",
+    for ln in lines:
+        title = _clean_text(ln, "")
+        if not title:
+            continue
+        module, case_type, priority, tag_tuple, expected = _infer_local_profile(ln)
+        tags = list(tag_tuple)
+        pro_case = {
+            "case_id": _make_case_id(title),
             "module": module,
+            "title": title,
             "priority": priority,
             "type": case_type,
-            "preconditions": [
-                "系统可访问",
-                "测试账号和测试数据已准备好",
+            "preconditions": list(_LOCAL_PRECONDITIONS),
+            "steps": [
+                dict(_LOCAL_STEP_PREPARE),
+                {
+                    "step_no": 2,
+                    "action": title,
+                    "test_data": "场景对应输入",
+                    "expected_result": "系统接收并处理请求",
+                },
+                {**_LOCAL_STEP_VERIFY, "expected_result": expected},
             ],
-            "steps": steps,
             "expected_result": expected,
             "tags": tags,
-            "automation": {
-                "kind": "demo",
-                "spec": {
-                    "steps": [
-                        {
-                            "type": "pass",
-                            "message": f"执行场景: {ln}",
-                        }
-                    ]
-                },
-            },
+            "automation_candidate": True,
+        }
+        spec = {
+            "steps": [{"type": "pass", "message": f"执行场景: {ln}"}],
+            "professional_case": pro_case,
         }
-        normalized = _normalize_case(row)
-        if normalized is not None:
-            out.append(normalized)
+        out.append(SuggestedCase(title=title, description="根据需求文本生成", tags=tags, kind="demo", spec=spec))
     return out
 
 
@@ -1984,7 +2512,7 @@ def _coerce_suggested_case_to_zh(s: SuggestedCase) -> SuggestedCase:
     pro["module"] = _to_zh_module(pro.get("module"))
     pro["preconditions"] = [
         _to_zh_text(x, "前置条件已满足", 200, force_default_on_non_cjk=True)
-        for x in _clean_list_str(pro.get("preconditions"), default=["系统可访问", "测试账号与测试数据已准备好"], max_items=10)
+        for x in _clean_list_str(pro.get("preconditions"), default=_DEFAULT_PRECONDITIONS, max_items=10)
     ]
     pro["expected_result"] = _to_zh_text(
         pro.get("expected_result"),
@@ -2016,7 +2544,7 @@ def _coerce_suggested_case_to_zh(s: SuggestedCase) -> SuggestedCase:
     spec: dict[str, Any]
     if isinstance(s.spec, dict):
         try:
-            spec = json.loads(json.dumps(s.spec, ensure_ascii=False))
+            spec = _json.loads(_json.dumps(s.spec))
         except Exception:
             spec = dict(s.spec)
     else:
@@ -2087,7 +2615,7 @@ def ai_runtime_status() -> dict[str, Any]:
         "qianwen_api_key_configured": has_qianwen,
         "qianwen_model": _qianwen_model(),
         "qianwen_base_url": _qianwen_base_url(),
-        "qianwen_base_urls": _qianwen_base_urls(),
+        "qianwen_base_urls": list(_qianwen_base_urls()),
         "qianwen_timeout_s": qianwen_timeout_effective,
         "qianwen_timeout_s_configured": qianwen_timeout_configured,
         "qianwen_retries": qianwen_retries_effective,
@@ -2106,6 +2634,79 @@ def ai_runtime_status() -> dict[str, Any]:
     }
 
 
+def _race_enabled() -> bool:
+    flag = os.environ.get("AI_RACE_PROVIDERS", "0").strip().lower()
+    return flag in ("1", "true", "yes", "on")
+
+
+def _race_head_start_s() -> float:
+    try:
+        return min(max(float(os.environ.get("AI_RACE_HEAD_START_S", "3") or "3"), 0.0), 60.0)
+    except Exception:
+        return 3.0
+
+
+def _race_providers(
+    text: str, providers: list[tuple[str, Any]]
+) -> tuple[list[SuggestedCase] | None, str, str | None]:
+    """
+    Run the providers (in preference order) concurrently; first success wins.
+
+    Each provider starts once the previous one has failed or has been running
+    for AI_RACE_HEAD_START_S, so a healthy preferred provider normally answers
+    alone and a slow one is overtaken instead of waited out. Providers that
+    have not started when a result arrives are skipped; ones already in
+    flight finish in the background and are discarded.
+    Returns (rows, provider, warning); rows is None when every provider failed.
+    """
+    head_start = _race_head_start_s()
+    won = threading.Event()
+    started = [threading.Event() for _ in providers]
+    failed = [threading.Event() for _ in providers]
+
+    def attempt(i: int, fn: Any) -> list[SuggestedCase] | None:
+        if i:
+            started[i - 1].wait()
+            failed[i - 1].wait(head_start)
+        started[i].set()
+        if won.is_set():
+            failed[i].set()
+            return None
+        try:
+            rows = fn(text)
+            if not rows:
+                raise RuntimeError("returned no cases")
+            return rows
+        except BaseException:
+            failed[i].set()
+            raise
+
+    order = [name for name, _ in providers]
+    errors: dict[str, BaseException] = {}
+
+    def warning() -> str | None:
+        return "; ".join(f"{n} failed: {errors[n]}" for n in order if n in errors) or None
+
+    pool = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="laitest-ai-race")
+    futures = {pool.submit(attempt, i, fn): name for i, (name, fn) in enumerate(providers)}
+    try:
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                rows = fut.result()
+            except Exception as e:
+                errors[name] = e
+                continue
+            if rows:
+                won.set()
+                preferred_failed = any(n in errors for n in order[: order.index(name)])
+                return rows, f"{name}-fallback" if preferred_failed else name, warning()
+    finally:
+        won.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+    return None, "local-fallback", warning()
+
+
 def generate_cases(prompt: str, model_provider: str | None = None) -> tuple[list[SuggestedCase], str, str | None]:
     """
     Preferred generator.
@@ -2160,6 +2761,24 @@ def generate_cases(prompt: str, model_provider: str | None = None) -> tuple[list
             local = _coerce_cases_default_language(generate_cases_local(text), text)
             return local, "local-fallback", f"gemini failed: {e}"
 
+    # Opt-in: race the configured providers instead of trying them in turn.
+    if _race_enabled():
+        providers = [
+            (name, fn)
+            for name, fn, ok in (
+                ("deepseek", _deepseek_generate_cases, has_deepseek),
+                ("qianwen", _qianwen_generate_cases, has_qianwen),
+                ("gemini", _gemini_generate_cases, has_gemini),
+            )
+            if ok
+        ]
+        if len(providers) > 1:
+            rows, provider, warning = _race_providers(text, providers)
+            if rows is not None:
+                return _coerce_cases_default_language(rows, text), provider, warning
+            local = _coerce_cases_default_language(generate_cases_local(text), text)
+            return local, provider, warning
+
     # Legacy/default path when provider is not specified.
     if has_deepseek:
         try:
@@ -2250,3 +2869,60 @@ def generate_cases(prompt: str, model_provider: str | None = None) -> tuple[list
         "local",
         "DEEPSEEK_API_KEY/DeepSeek_API_KEY, QIANWEN_API_KEY and GEMINI_API_KEY are not configured; using local generator",
     )
+
+
+# Prompts accepted per generate_cases_batch call by the HTTP endpoints.
+GENERATE_BATCH_MAX_PROMPTS = 20
+
+
+def generate_cases_batch(
+    prompts: list[str], model_provider: str | None = None
+) -> list[tuple[list[SuggestedCase], str, str | None]]:
+    """
+    generate_cases for several prompts; results keep input order.
+    When Gemini is the provider generate_cases would use, up to
+    GEMINI_BATCH_MAX_PROMPTS prompts share one request. Prompts a batch could
+    not satisfy (or every prompt of a batch that failed) fall back to the
+    per-prompt generate_cases path.
+    """
+    texts = [(p or "").strip() for p in prompts]
+    selected = str(model_provider or "").strip().lower()
+    has_gemini = bool(os.environ.get("GEMINI_API_KEY", "").strip())
+    gemini_first = has_gemini and (
+        selected == "gemini" or (not selected and not _deepseek_api_key() and not _qianwen_api_key())
+    )
+
+    batched: dict[int, list[SuggestedCase]] = {}
+    if gemini_first:
+        pending = [i for i, t in enumerate(texts) if t]
+        # Same keys as the single-prompt Gemini path, so either one serves the other's hits.
+        cache_size = _safe_int_env("AI_CACHE_SIZE", 0, 0, 4096)
+        keys: dict[int, bytes] = {}
+        if cache_size:
+            model = _gemini_model()
+            keys = {i: _response_cache_key("gemini", model, texts[i]) for i in pending}
+            hits = {i: rows for i in pending if (rows := _response_cache_get(keys[i])) is not None}
+            batched.update(hits)
+            pending = [i for i in pending if i not in hits]
+        step = _gemini_batch_size()
+        for start in range(0, len(pending), step):
+            chunk = pending[start : start + step]
+            if len(chunk) < 2:
+                break
+            try:
+                results = _gemini_generate_cases_batch(tuple(texts[i] for i in chunk))
+            except Exception:
+                continue
+            for i, rows in zip(chunk, results):
+                if rows:
+                    batched[i] = rows
+                    if cache_size:
+                        _response_cache_put(keys[i], rows, cache_size)
+
+    out: list[tuple[list[SuggestedCase], str, str | None]] = []
+    for i, text in enumerate(texts):
+        if i in batched:
+            out.append((_coerce_cases_default_language(batched[i], text), "gemini", None))
+        else:
+            out.append(generate_cases(text, model_provider=model_provider))
+    return out
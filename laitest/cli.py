@@ -5,10 +5,10 @@ import json
 from typing import Any
 
 from .ai import generate_cases
-from .db import db_conn, json_loads, row_to_dict, utc_now_iso
+from .db import db_conn, fetch_cases_by_id, json_loads, row_to_dict, utc_now_iso
 from .ids import new_id
 from .report import render_run_report
-from .runner import analyze_failures, run_case, summarize_run
+from .runner import analyze_failures, run_cases, summarize_run
 
 
 def _pp(obj: object) -> None:
@@ -211,24 +211,27 @@ def run_cli(argv: list[str]) -> int:
             con.commit()
 
             items = con.execute("SELECT * FROM run_items WHERE run_id=? ORDER BY id", (rid,)).fetchall()
+            cases_by_id = fetch_cases_by_id(con, (it["case_id"] for it in items))
+            pending = []
             for it in items:
-                case = con.execute("SELECT * FROM cases WHERE id=?", (it["case_id"],)).fetchone()
+                case = cases_by_id.get(it["case_id"])
                 if not case:
                     con.execute(
                         "UPDATE run_items SET status=?, log=? WHERE id=?",
                         ("failed", "case not found", it["id"]),
                     )
-                    con.commit()
                     continue
-                kind = str(case["kind"])
-                spec = json_loads(str(case["spec_json"]), {})
-                ok, msg, data, dur_ms = run_case(kind=kind, spec=spec)
+                pending.append((it, str(case["kind"]), json_loads(str(case["spec_json"]), {})))
+            con.commit()
+
+            results = run_cases([(kind, spec) for _, kind, spec in pending])
+            for (it, _, _), (ok, msg, data, dur_ms) in zip(pending, results):
                 status = "passed" if ok else "failed"
                 con.execute(
                     "UPDATE run_items SET status=?, duration_ms=?, log=?, data_json=? WHERE id=?",
                     (status, int(dur_ms), msg, json.dumps(data, ensure_ascii=True), it["id"]),
                 )
-                con.commit()
+            con.commit()
 
             items2 = [row_to_dict(r) for r in con.execute("SELECT * FROM run_items WHERE run_id=?", (rid,))]
             summary = summarize_run(items2)
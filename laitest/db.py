@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-import json
 import os
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Iterator
+from typing import Any, Iterable, Iterator
+
+from . import _json
 
 
 def utc_now_iso() -> str:
@@ -36,15 +39,44 @@ def db_path() -> Path:
     return _data_dir() / "laitest.db"
 
 
+# journal_mode=WAL is persisted in the database file, so it only needs to be
+# set once per path; the other PRAGMAs are per-connection.
+_WAL_PATHS: set[str] = set()
+_WAL_LOCK = threading.Lock()
+_CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON;",
+    "PRAGMA synchronous = NORMAL;",
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA mmap_size = 268435456;",
+    "PRAGMA cache_size = -65536;",
+    "PRAGMA busy_timeout = 5000;",
+)
+
+
+def _ensure_wal(con: sqlite3.Connection, path: str) -> None:
+    if path in _WAL_PATHS:
+        return
+    with _WAL_LOCK:
+        if path in _WAL_PATHS:
+            return
+        con.execute("PRAGMA journal_mode = WAL;")
+        _WAL_PATHS.add(path)
+
+
 @dataclass(frozen=True)
 class DB:
     path: Path
 
     def connect(self) -> sqlite3.Connection:
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        con = sqlite3.connect(str(self.path))
+        path = str(self.path)
+        # Pooled connections may be handed to a different thread; each one is
+        # only ever checked out by a single thread at a time.
+        con = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
         con.row_factory = sqlite3.Row
-        con.execute("PRAGMA foreign_keys = ON;")
+        _ensure_wal(con, path)
+        for pragma in _CONNECTION_PRAGMAS:
+            con.execute(pragma)
         return con
 
 
@@ -105,28 +137,142 @@ def ensure_schema(con: sqlite3.Connection) -> None:
           FOREIGN KEY(run_id) REFERENCES runs(id) ON DELETE CASCADE,
           FOREIGN KEY(case_id) REFERENCES cases(id) ON DELETE CASCADE
         );
+
+        CREATE INDEX IF NOT EXISTS idx_run_items_run_id ON run_items(run_id);
+        CREATE INDEX IF NOT EXISTS idx_run_items_case_id ON run_items(case_id);
+        CREATE INDEX IF NOT EXISTS idx_cases_proj_suite_updated ON cases(project_id, suite_id, updated_at DESC);
+        CREATE INDEX IF NOT EXISTS idx_runs_proj_suite_created ON runs(project_id, suite_id, created_at DESC);
+
+        CREATE TABLE IF NOT EXISTS table_versions (
+          name TEXT PRIMARY KEY,
+          version INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS meta (
+          key TEXT PRIMARY KEY,
+          value TEXT NOT NULL
+        );
+        INSERT OR IGNORE INTO meta(key, value) VALUES('epoch', lower(hex(randomblob(8))));
         """
+        + _VERSION_TRIGGERS_SQL
     )
     con.commit()
 
 
+# Tables whose list endpoints are cached by ETag. Every write (including
+# ON DELETE CASCADE) bumps a counter, which, unlike MAX(updated_at) or
+# COUNT(*), also changes on deletes and in-place edits. Counters restart at 0
+# in a new database; ETags also carry db_epoch() to tell those apart.
+VERSIONED_TABLES = ("projects", "suites", "cases", "runs")
+_VERSION_TRIGGERS_SQL = "".join(
+    f"""
+        INSERT OR IGNORE INTO table_versions(name, version) VALUES('{t}', 0);
+        CREATE TRIGGER IF NOT EXISTS trg_{t}_version_{op.lower()} AFTER {op} ON {t}
+        BEGIN
+          UPDATE table_versions SET version = version + 1 WHERE name = '{t}';
+        END;
+        """
+    for t in VERSIONED_TABLES
+    for op in ("INSERT", "UPDATE", "DELETE")
+)
+
+
+def table_version(con: sqlite3.Connection, name: str) -> int:
+    row = con.execute("SELECT version FROM table_versions WHERE name=?", (name,)).fetchone()
+    return int(row[0]) if row else 0
+
+
+def db_epoch(con: sqlite3.Connection) -> str:
+    # Random per database file, so a recreated database (a new serverless
+    # instance's /tmp, or a deleted .laitest) never repeats old version numbers.
+    row = con.execute("SELECT value FROM meta WHERE key='epoch'").fetchone()
+    return str(row[0]) if row else ""
+
+
+# Hot single-row lookups, compiled once when a pooled connection is created.
+# The statement cache is keyed by the exact SQL text, so keep these in sync
+# with the callers.
+_WARM_STATEMENTS = (
+    "SELECT * FROM suites WHERE project_id=? ORDER BY created_at DESC",
+    "SELECT * FROM cases WHERE id=?",
+    "SELECT * FROM runs WHERE id=?",
+    "SELECT * FROM run_items WHERE run_id=?",
+    "SELECT * FROM run_items WHERE run_id=? ORDER BY id",
+)
+
+
+def _warm_statements(con: sqlite3.Connection) -> None:
+    for sql in _WARM_STATEMENTS:
+        con.execute(sql, ("",)).fetchone()
+
+
+_POOL_SIZE = 16
+_POOLS: dict[str, queue.LifoQueue[sqlite3.Connection]] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _pool_for(path: Path) -> queue.LifoQueue[sqlite3.Connection]:
+    key = str(path)
+    pool = _POOLS.get(key)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.setdefault(key, queue.LifoQueue(maxsize=_POOL_SIZE))
+    return pool
+
+
 @contextmanager
 def db_conn() -> Iterator[sqlite3.Connection]:
-    db = DB(path=db_path())
-    con = db.connect()
+    path = db_path()
+    pool = _pool_for(path)
+    try:
+        con = pool.get_nowait()
+    except queue.Empty:
+        con = DB(path=path).connect()
+        try:
+            ensure_schema(con)
+            _warm_statements(con)
+        except Exception:
+            con.close()
+            raise
     try:
-        ensure_schema(con)
         yield con
     finally:
-        con.close()
+        try:
+            if con.in_transaction:
+                con.rollback()
+            pool.put_nowait(con)
+        except (sqlite3.Error, queue.Full):
+            con.close()
+
+
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER (999 on older builds).
+_IN_CHUNK = 500
+
+
+def fetch_cases_by_id(con: sqlite3.Connection, case_ids: Iterable[str]) -> dict[str, sqlite3.Row]:
+    ids = list(dict.fromkeys(case_ids))
+    out: dict[str, sqlite3.Row] = {}
+    for i in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[i : i + _IN_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        for r in con.execute(f"SELECT * FROM cases WHERE id IN ({placeholders})", chunk):
+            out[r["id"]] = r
+    return out
 
 
 def row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
     return {k: row[k] for k in row.keys()}
 
 
+def iter_dicts(cur: sqlite3.Cursor) -> Iterator[dict[str, Any]]:
+    # Column names are read once from cursor.description instead of per row.
+    cols = [c[0] for c in cur.description or ()]
+    for r in cur:
+        yield dict(zip(cols, r))
+
+
 def json_loads(s: str, default: Any) -> Any:
     try:
-        return json.loads(s)
+        return _json.loads(s)
     except Exception:
         return default
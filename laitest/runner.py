@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import json
+import os
 import time
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any
 
@@ -126,6 +128,40 @@ def run_case(kind: str, spec: dict[str, Any]) -> tuple[bool, str, dict[str, Any]
     return True, "ok", meta, duration_ms
 
 
+def _case_workers() -> int:
+    try:
+        return max(1, int(os.environ.get("LAITEST_CASE_WORKERS", "") or 8))
+    except ValueError:
+        return 8
+
+
+def _run_job(job: tuple[str, dict[str, Any]]) -> tuple[bool, str, dict[str, Any], int]:
+    started = time.time()
+    try:
+        return run_case(kind=job[0], spec=job[1])
+    except Exception as e:
+        # One broken case fails its own item, not the whole batch.
+        return False, f"error: {e.__class__.__name__}: {e}", {}, int((time.time() - started) * 1000)
+
+
+def run_cases(
+    jobs: list[tuple[str, dict[str, Any]]], max_workers: int | None = None
+) -> list[tuple[bool, str, dict[str, Any], int]]:
+    """
+    Run independent (kind, spec) cases concurrently; results keep input order.
+
+    Cases are I/O bound (http_get, sleep), so a thread pool overlaps their waits.
+    An exception from run_case becomes a failed result for that case only.
+    """
+    if not jobs:
+        return []
+    workers = min(max_workers or _case_workers(), len(jobs))
+    if workers <= 1:
+        return [_run_job(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="laitest-case") as ex:
+        return list(ex.map(_run_job, jobs))
+
+
 def summarize_run(items: list[dict[str, Any]]) -> dict[str, Any]:
     total = len(items)
     passed = sum(1 for it in items if it.get("status") == "passed")
@@ -133,6 +169,15 @@ def summarize_run(items: list[dict[str, Any]]) -> dict[str, Any]:
     return {"total": total, "passed": passed, "failed": failed}
 
 
+def summarize_status_counts(counts: dict[str, int]) -> dict[str, Any]:
+    """Same shape as summarize_run, from a `status -> count` aggregate."""
+    return {
+        "total": sum(counts.values()),
+        "passed": counts.get("passed", 0),
+        "failed": counts.get("failed", 0),
+    }
+
+
 def analyze_failures(items: list[dict[str, Any]]) -> dict[str, Any]:
     """
     Offline "smart" analysis: cluster by top-level error messages.
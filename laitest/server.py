@@ -11,10 +11,16 @@ from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from urllib.parse import parse_qs, urlparse
 
-from .ai import ai_runtime_status, generate_cases, professional_case_from_suggested
-from .db import db_conn, json_loads, row_to_dict, utc_now_iso
+from .ai import (
+    GENERATE_BATCH_MAX_PROMPTS,
+    ai_runtime_status,
+    generate_cases,
+    generate_cases_batch,
+    professional_case_from_suggested,
+)
+from .db import db_conn, fetch_cases_by_id, json_loads, row_to_dict, utc_now_iso
 from .ids import new_id
-from .runner import analyze_failures, run_case, summarize_run
+from .runner import analyze_failures, run_cases, summarize_run
 
 
 def _static_dir() -> Path:
@@ -117,25 +123,27 @@ class _RunWorker:
             con.commit()
 
             items = con.execute("SELECT * FROM run_items WHERE run_id=?", (run_id,)).fetchall()
+            cases_by_id = fetch_cases_by_id(con, (it["case_id"] for it in items))
+            pending = []
             for it in items:
-                case = con.execute("SELECT * FROM cases WHERE id=?", (it["case_id"],)).fetchone()
+                case = cases_by_id.get(it["case_id"])
                 if not case:
                     con.execute(
                         "UPDATE run_items SET status=?, log=? WHERE id=?",
                         ("failed", "case not found", it["id"]),
                     )
-                    con.commit()
                     continue
+                pending.append((it, str(case["kind"]), json_loads(str(case["spec_json"]), {})))
+            con.commit()
 
-                kind = str(case["kind"])
-                spec = json_loads(str(case["spec_json"]), {})
-                ok, msg, data, dur_ms = run_case(kind=kind, spec=spec)
+            results = run_cases([(kind, spec) for _, kind, spec in pending])
+            for (it, _, _), (ok, msg, data, dur_ms) in zip(pending, results):
                 status = "passed" if ok else "failed"
                 con.execute(
                     "UPDATE run_items SET status=?, duration_ms=?, log=?, data_json=? WHERE id=?",
                     (status, int(dur_ms), msg, json.dumps(data, ensure_ascii=True), it["id"]),
                 )
-                con.commit()
+            con.commit()
 
             items2 = [row_to_dict(r) for r in con.execute("SELECT * FROM run_items WHERE run_id=?", (run_id,))]
             summary = summarize_run(items2)
@@ -528,6 +536,48 @@ class Handler(BaseHTTPRequestHandler):
                 )
                 return
 
+            if path == "/api/ai/generate_cases_batch":
+                raw_prompts = body.get("prompts") if isinstance(body.get("prompts"), list) else []
+                prompts = [str(p or "") for p in raw_prompts]
+                if not prompts:
+                    self._err(400, "missing prompts")
+                    return
+                if len(prompts) > GENERATE_BATCH_MAX_PROMPTS:
+                    self._err(400, f"too many prompts (max {GENERATE_BATCH_MAX_PROMPTS})")
+                    return
+                model_provider = str(body.get("model_provider") or "").strip().lower() or None
+
+                t0 = time.monotonic()
+                results = generate_cases_batch(prompts, model_provider=model_provider)
+                elapsed_ms = int((time.monotonic() - t0) * 1000)
+                _send_json(
+                    self,
+                    200,
+                    {
+                        "results": [
+                            {
+                                "suggestions": [
+                                    {
+                                        "title": s.title,
+                                        "description": s.description,
+                                        "tags": s.tags,
+                                        "kind": s.kind,
+                                        "spec": s.spec,
+                                        "test_case": professional_case_from_suggested(s),
+                                    }
+                                    for s in suggestions
+                                ],
+                                "provider": provider,
+                                "warning": warning,
+                            }
+                            for suggestions, provider, warning in results
+                        ],
+                        "requested_provider": model_provider,
+                        "elapsed_ms": elapsed_ms,
+                    },
+                )
+                return
+
         self._err(404, "not found")
 
     def _api_put(self, path: str, body: dict) -> None:
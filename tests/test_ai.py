@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import email.message
+import json
+import os
+import time
+import unittest
+from typing import Any
+from unittest import mock
+from urllib import error
+
+from laitest import ai
+
+
+def _http_error(retry_after: str) -> error.HTTPError:
+    headers = email.message.Message()
+    headers["Retry-After"] = retry_after
+    return error.HTTPError("http://upstream.invalid/", 429, "Too Many Requests", headers, None)
+
+
+class SleepBeforeRetryTests(unittest.TestCase):
+    def test_retry_after_past_deadline_skips_the_retry(self) -> None:
+        with mock.patch.object(ai.time, "sleep") as sleep:
+            ok = ai._sleep_before_retry(time.monotonic() + 2.0, 1, _http_error("20"))
+        self.assertFalse(ok)
+        sleep.assert_not_called()
+
+    def test_retry_after_within_deadline_sleeps(self) -> None:
+        with mock.patch.object(ai.time, "sleep") as sleep:
+            ok = ai._sleep_before_retry(time.monotonic() + 60.0, 1, _http_error("2"))
+        self.assertTrue(ok)
+        sleep.assert_called_once_with(2.0)
+
+
+def _cases_json(title: str) -> dict[str, Any]:
+    return {"cases": [{"title": title, "steps": [{"action": "登录", "expected_result": "成功"}], "type": "functional"}]}
+
+
+class GenerateCasesBatchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        env = mock.patch.dict(
+            os.environ,
+            {"GEMINI_API_KEY": "k", "AI_BREAKER_FAILS": "1", "AI_CACHE_SIZE": "0"},
+            clear=True,
+        )
+        env.start()
+        self.addCleanup(env.stop)
+        ai.reset_config()
+        self.addCleanup(ai.reset_config)
+        self.user_prompts: list[str] = []
+
+    def _gemini(self, replies: list[dict[str, Any]]) -> Any:
+        def content_text(prompt: str) -> str:
+            self.user_prompts.append(prompt)
+            return json.dumps(replies.pop(0), ensure_ascii=False)
+
+        return mock.patch.object(ai, "_gemini_content_text", content_text)
+
+    def test_prompts_share_one_gemini_request(self) -> None:
+        reply = {"batches": [{"req": 0, **_cases_json("A 登录成功")}, {"req": 1, **_cases_json("B 登录失败")}]}
+        with self._gemini([reply]):
+            results = ai.generate_cases_batch(["需求 A", "需求 B"])
+        self.assertEqual(len(self.user_prompts), 1)
+        self.assertEqual([provider for _, provider, _ in results], ["gemini", "gemini"])
+        self.assertEqual([rows[0].title for rows, _, _ in results], ["A 登录成功", "B 登录失败"])
+
+    def test_prompt_missing_from_batch_falls_back_to_single_request(self) -> None:
+        batch = {"batches": [{"req": 0, **_cases_json("A 登录成功")}]}
+        with self._gemini([batch, _cases_json("B 单独生成")]):
+            results = ai.generate_cases_batch(["需求 A", "需求 B"])
+        self.assertEqual(len(self.user_prompts), 2)
+        self.assertIn("需求 B", self.user_prompts[1])
+        self.assertNotIn("---REQ", self.user_prompts[1])
+        self.assertEqual([rows[0].title for rows, _, _ in results], ["A 登录成功", "B 单独生成"])
+
+    def test_failed_batch_trips_the_gemini_breaker(self) -> None:
+        with self._gemini([{"unexpected": True}]):
+            results = ai.generate_cases_batch(["需求 A", "需求 B"])
+        # The breaker opened on the batch failure, so the per-prompt fallback
+        # skips Gemini without another request and answers locally.
+        self.assertEqual(len(self.user_prompts), 1)
+        self.assertEqual([provider for _, provider, _ in results], ["local-fallback", "local-fallback"])
+        self.assertTrue(all("circuit open" in (warning or "") for _, _, warning in results))
+
+    def test_batches_are_capped(self) -> None:
+        os.environ["GEMINI_BATCH_MAX_PROMPTS"] = "2"
+        replies = [
+            {"batches": [{"req": 0, **_cases_json(f"{n} 登录")}, {"req": 1, **_cases_json(f"{n + 1} 登录")}]}
+            for n in (0, 2)
+        ]
+        with self._gemini(replies):
+            results = ai.generate_cases_batch([f"需求 {n}" for n in range(4)])
+        self.assertEqual(len(self.user_prompts), 2)
+        self.assertEqual([rows[0].title for rows, _, _ in results], ["0 登录", "1 登录", "2 登录", "3 登录"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from api import index
+except ImportError:  # Flask is only needed for the Vercel entry point.
+    index = None
+
+from laitest.ai import reset_config
+from laitest.db import db_conn, utc_now_iso
+
+
+@unittest.skipIf(index is None, "flask is not installed")
+class PutCaseTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = mock.patch.dict(os.environ, {"LAITEST_DATA_DIR": tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = index.app.test_client()
+
+    def test_identical_put_on_stdlib_json_row_is_a_no_op(self) -> None:
+        tags = ["登录", "smoke"]
+        spec = {"steps": [{"type": "pass", "message": "中文"}]}
+        now = utc_now_iso()
+        # Same encoding laitest/server.py and laitest/cli.py write with.
+        with db_conn() as con:
+            con.execute("INSERT INTO projects(id,name,created_at) VALUES(?,?,?)", ("prj_1", "p", now))
+            con.execute(
+                """
+                INSERT INTO cases(id,project_id,suite_id,title,description,tags_json,kind,spec_json,created_at,updated_at)
+                VALUES(?,?,?,?,?,?,?,?,?,?)
+                """,
+                (
+                    "case_1",
+                    "prj_1",
+                    None,
+                    "t",
+                    "d",
+                    json.dumps(tags, ensure_ascii=True),
+                    "demo",
+                    json.dumps(spec, ensure_ascii=True),
+                    "2000-01-01T00:00:00+00:00",
+                    "2000-01-01T00:00:00+00:00",
+                ),
+            )
+            con.commit()
+
+        resp = self.client.put(
+            "/api/case/case_1",
+            json={"title": "t", "description": "d", "tags": tags, "kind": "demo", "spec": spec},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json(), {"ok": True, "unchanged": True})
+        with db_conn() as con:
+            row = con.execute("SELECT updated_at FROM cases WHERE id=?", ("case_1",)).fetchone()
+        self.assertEqual(row["updated_at"], "2000-01-01T00:00:00+00:00")
+
+
+@unittest.skipIf(index is None, "flask is not installed")
+class PostRunsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = mock.patch.dict(os.environ, {"LAITEST_DATA_DIR": tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+        self.client = index.app.test_client()
+
+    def test_run_executes_inline_on_vercel(self) -> None:
+        pid = self.client.post("/api/projects", json={"name": "p"}).get_json()["project"]["id"]
+        cid = self.client.post(
+            "/api/cases",
+            json={"project_id": pid, "title": "ok", "kind": "demo", "spec": {"steps": [{"type": "pass"}]}},
+        ).get_json()["case"]["id"]
+
+        with mock.patch.object(index, "_RUN_INLINE", True):
+            resp = self.client.post("/api/runs", json={"project_id": pid, "case_ids": [cid]})
+        self.assertEqual(resp.status_code, 201)
+        run = resp.get_json()["run"]
+        self.assertEqual(run["status"], "finished")
+        shown = self.client.get(f"/api/run/{run['id']}").get_json()
+        self.assertEqual([it["status"] for it in shown["items"]], ["passed"])
+
+
+@unittest.skipIf(index is None, "flask is not installed")
+class GenerateCasesBatchEndpointTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = index.app.test_client()
+
+    def test_results_keep_prompt_order(self) -> None:
+        with mock.patch.dict(os.environ, {}, clear=True):
+            reset_config()
+            self.addCleanup(reset_config)
+            resp = self.client.post("/api/ai/generate_cases_batch", json={"prompts": ["登录失败", "", "支付超时"]})
+        self.assertEqual(resp.status_code, 200)
+        results = resp.get_json()["results"]
+        self.assertEqual([r["provider"] for r in results], ["local", "none", "local"])
+        self.assertEqual(results[0]["suggestions"][0]["title"], "登录失败")
+        self.assertEqual(results[1]["suggestions"], [])
+
+    def test_too_many_prompts_is_rejected(self) -> None:
+        prompts = ["p"] * (index.GENERATE_BATCH_MAX_PROMPTS + 1)
+        resp = self.client.post("/api/ai/generate_cases_batch", json={"prompts": prompts})
+        self.assertEqual(resp.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from typing import Any
+from unittest import mock
+
+from laitest import runner
+from laitest.cli import run_cli
+
+
+def _cli(*argv: str) -> Any:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        code = run_cli(list(argv))
+    if code != 0:
+        raise AssertionError(f"cli {argv} exited {code}")
+    return json.loads(out.getvalue())
+
+
+class RunCreateTests(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        env = mock.patch.dict(os.environ, {"LAITEST_DATA_DIR": tmp.name})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_raising_case_keeps_other_item_results(self) -> None:
+        real_run_case = runner.run_case
+
+        def run_case(kind: str, spec: dict[str, Any]) -> tuple[bool, str, dict[str, Any], int]:
+            if spec.get("boom"):
+                raise RuntimeError("exploded")
+            return real_run_case(kind=kind, spec=spec)
+
+        pid = _cli("project-create", "p")["project_id"]
+        ok_id = _cli("case-create", pid)["case_id"]
+        bad_id = _cli("case-create", pid, "--spec", '{"boom": true}')["case_id"]
+        with mock.patch.object(runner, "run_case", run_case):
+            rid = _cli("run-create", pid, "--case-id", ok_id, "--case-id", bad_id)["run_id"]
+
+        shown = _cli("run-show", rid)
+        self.assertEqual(shown["run"]["status"], "finished")
+        self.assertEqual(shown["run"]["summary"]["passed"], 1)
+        self.assertEqual(shown["run"]["summary"]["failed"], 1)
+        by_case = {it["case_id"]: it for it in shown["items"]}
+        self.assertEqual(by_case[ok_id]["status"], "passed")
+        self.assertEqual(by_case[bad_id]["status"], "failed")
+        self.assertEqual(by_case[bad_id]["log"], "error: RuntimeError: exploded")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from laitest.db import DB, db_epoch, ensure_schema, table_version
+
+
+class DbEpochTests(unittest.TestCase):
+    def _connect(self, path: Path):
+        con = DB(path=path).connect()
+        self.addCleanup(con.close)
+        ensure_schema(con)
+        return con
+
+    def test_epoch_is_stable_per_database_and_differs_across_databases(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        a = self._connect(Path(tmp.name) / "a.db")
+        b = self._connect(Path(tmp.name) / "b.db")
+
+        epoch_a = db_epoch(a)
+        self.assertTrue(epoch_a)
+        ensure_schema(a)
+        self.assertEqual(db_epoch(a), epoch_a)
+        # Same counters, different contents: only the epoch tells them apart.
+        self.assertEqual(table_version(a, "projects"), table_version(b, "projects"))
+        self.assertNotEqual(db_epoch(b), epoch_a)
+
+
+if __name__ == "__main__":
+    unittest.main()
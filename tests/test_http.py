@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import socket
+import threading
+import time
+import unittest
+
+from laitest import _http
+
+
+class _KeepAliveServer:
+    """
+    Tiny HTTP/1.1 server on 127.0.0.1 that answers "ok" with keep-alive.
+    `drop_after_read` is the 1-based request number the server reads and then
+    closes the connection on without answering (an idle-timeout race).
+    `close_idle` closes every connection shortly after each answer.
+    """
+
+    def __init__(self, drop_after_read: int | None = None, close_idle: bool = False) -> None:
+        self.drop_after_read = drop_after_read
+        self.close_idle = close_idle
+        self.requests: list[bytes] = []
+        self.connections = 0
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen()
+        self.url = f"http://127.0.0.1:{self._sock.getsockname()[1]}/x"
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        with conn, conn.makefile("rb") as f:
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                length = 0
+                while (header := f.readline()) not in (b"\r\n", b""):
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                if length:
+                    f.read(length)
+                self.requests.append(line)
+                if len(self.requests) == self.drop_after_read:
+                    return
+                conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                if self.close_idle:
+                    time.sleep(0.05)
+                    return
+
+
+class RequestStaleConnectionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _http._proxied.cache_clear()
+        self.addCleanup(self._close_pools)
+
+    @staticmethod
+    def _close_pools() -> None:
+        for pool in _http._POOLS.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+        _http._POOLS.clear()
+
+    def test_idle_closed_connection_is_not_reused(self) -> None:
+        server = _KeepAliveServer(close_idle=True)
+        self.addCleanup(server.close)
+        self.assertEqual(_http.request("GET", server.url, timeout=5), b"ok")
+        time.sleep(0.2)
+        self.assertEqual(_http.request("GET", server.url, timeout=5), b"ok")
+        self.assertEqual(server.connections, 2)
+
+    def test_reused_connection_dropped_before_response_is_replayed(self) -> None:
+        server = _KeepAliveServer(drop_after_read=2)
+        self.addCleanup(server.close)
+        self.assertEqual(_http.request("POST", server.url, body=b"a", timeout=5), b"ok")
+        self.assertEqual(_http.request("POST", server.url, body=b"b", timeout=5), b"ok")
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.connections, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
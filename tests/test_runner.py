@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import unittest
+from typing import Any
+from unittest import mock
+
+from laitest import runner
+
+
+def _exploding_run_case(kind: str, spec: dict[str, Any]) -> tuple[bool, str, dict[str, Any], int]:
+    if spec.get("boom"):
+        raise ValueError("bad spec")
+    return True, "ok", {"steps": []}, 0
+
+
+class RunCasesTests(unittest.TestCase):
+    def test_results_keep_input_order(self) -> None:
+        jobs = [("demo", {"steps": [{"type": "pass", "message": str(i)}]}) for i in range(5)]
+        results = runner.run_cases(jobs, max_workers=3)
+        self.assertEqual(len(results), 5)
+        for i, (ok, msg, data, _) in enumerate(results):
+            self.assertTrue(ok)
+            self.assertEqual(msg, "ok")
+            self.assertEqual(data["steps"][0]["message"], str(i))
+
+    def test_raising_case_fails_only_its_own_result(self) -> None:
+        jobs = [("demo", {}), ("demo", {"boom": True}), ("demo", {})]
+        for workers in (1, 3):
+            with self.subTest(workers=workers), mock.patch.object(runner, "run_case", _exploding_run_case):
+                results = runner.run_cases(jobs, max_workers=workers)
+            self.assertEqual([r[0] for r in results], [True, False, True])
+            self.assertEqual(results[1][1], "error: ValueError: bad spec")
+            self.assertEqual(results[1][2], {})
+
+
+if __name__ == "__main__":
+    unittest.main()